@@ -1,13 +1,23 @@
 # app/ai/profile_analyzer.py
-import os, json, re
+import os, json, re, logging
 import google.generativeai as genai
 from typing import Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from app.metrics import Counter
+from app.services import analysis_cache
+
+MODEL = "gemini-1.5-flash"
+# per call: the résumé analyzer renews its lease while a call runs, so a hung call must end
+TIMEOUT_SEC = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+log = logging.getLogger("profile_analyzer")
 
 PROMPT = """You are a career analyst. Using the data below, produce:
 1) background_summary: 4-6 sentences about the person's background.
 2) tone: 3-5 adjectives that match their writing/brand tone.
 3) keywords: 8-12 short keywords/phrases relevant to expertise.
-Return strict JSON with keys: background_summary, tone (array), keywords (array).
+Return a JSON object with keys: background_summary (string), tone (array of strings),
+keywords (array of strings).
 
 LINKEDIN:
 {linkedin}
@@ -16,27 +26,144 @@ RESUME:
 {resume}
 """
 
-def analyze_profile(linkedin: dict, resume_text: Optional[str], api_key: Optional[str] = None) -> dict:
+# Follow-up for the fields a reply left out or got wrong: the earlier answer stands in
+# for the full inputs, so this is a small call rather than a re-run.
+REPAIR_PROMPT = """Your earlier analysis of a professional profile was:
+{partial}
+
+It is missing or has invalid values for: {fields}.
+Return a JSON object with only these keys:
+{spec}
+"""
+FIELD_SPECS = {
+    "background_summary": "background_summary: 4-6 sentences about the person's background (string)",
+    "tone": "tone: 3-5 adjectives that match their writing/brand tone (array of strings)",
+    "keywords": "keywords: 8-12 short keywords/phrases relevant to expertise (array of strings)",
+}
+# part of every analysis_cache key: changing PROMPT or MODEL invalidates cached results
+PROMPT_VERSION = analysis_cache.prompt_version(PROMPT + REPAIR_PROMPT, MODEL)
+
+M_REPLIES = Counter("analyze_profile_replies_total", "Gemini profile analyses by reply quality", ("result",))
+
+
+class IncompleteAnalysis(Exception):
+    """Gemini's reply still lacked fields after the repair call; `insights` holds the valid ones."""
+
+    def __init__(self, missing: list[str], insights: dict):
+        super().__init__(f"analysis incomplete, missing {', '.join(missing)}")
+        self.missing = missing
+        self.insights = insights
+
+
+class ProfileInsights(BaseModel):
+    background_summary: str = Field(min_length=1)
+    tone: list[str] = Field(min_length=1)
+    keywords: list[str] = Field(min_length=1)
+
+    @field_validator("background_summary", mode="before")
+    @classmethod
+    def _strip(cls, v):
+        return v.strip() if isinstance(v, str) else v
+
+    @field_validator("tone", "keywords", mode="before")
+    @classmethod
+    def _as_list(cls, v):
+        # repair common near-misses locally: "a, b, c" or ["a ", "", "b"]
+        if isinstance(v, str):
+            v = re.split(r"[,;\n]", v)
+        if isinstance(v, list):
+            v = [s.strip() for s in v if isinstance(s, str) and s.strip()]
+        return v
+
+
+def _schema(fields) -> dict:
+    props = {f: {"type": "STRING"} if f == "background_summary" else {"type": "ARRAY", "items": {"type": "STRING"}}
+             for f in fields}
+    return {"type": "OBJECT", "properties": props, "required": list(fields)}
+
+
+def _generate(model, prompt: str, fields) -> str:
+    """JSON-mode call constrained to `fields`; plain text if this SDK can't take a schema."""
+    opts = {"timeout": TIMEOUT_SEC}
+    try:
+        resp = model.generate_content(prompt, generation_config=genai.GenerationConfig(
+            response_mime_type="application/json", response_schema=_schema(fields)), request_options=opts)
+    except (TypeError, ValueError, KeyError):  # SDK too old for response_schema
+        resp = model.generate_content(prompt, request_options=opts)
+    return (getattr(resp, "text", None) or "").strip()
+
+
+def _parse(out: str) -> dict:
+    """The reply's JSON object, or {} (JSON mode should make the fallback scan rare)."""
+    try:
+        data = json.loads(out)
+    except ValueError:
+        data = None
+        start = out.find("{")
+        if start >= 0:
+            try:
+                data, _end = json.JSONDecoder().raw_decode(out[start:])
+            except ValueError:
+                pass
+    return data if isinstance(data, dict) else {}
+
+
+def _validate(data: dict) -> tuple[dict, list[str]]:
+    """(valid fields, names of missing or invalid fields)."""
+    try:
+        return ProfileInsights.model_validate(data).model_dump(), []
+    except ValidationError as e:
+        bad = sorted({err["loc"][0] for err in e.errors() if err["loc"]})
+    good = {}
+    for name in FIELD_SPECS:
+        if name in bad:
+            continue
+        # validate the good fields on their own, with placeholders for the bad ones
+        probe = {f: data.get(f) if f == name else ("x" if f == "background_summary" else ["x"]) for f in FIELD_SPECS}
+        good[name] = getattr(ProfileInsights.model_validate(probe), name)
+    return good, bad
+
+
+def analyze_profile(linkedin: dict, resume_text: Optional[str], api_key: Optional[str] = None,
+                    use_cache: bool = True) -> dict:
     # prefer per-user key; fallback to process env
     key = api_key or os.getenv("GEMINI_API_KEY", "")
     if not key:
         # safe fallback so UI gets something instead of a 500
         return {"background_summary": "", "tone": [], "keywords": []}
 
+    # identical inputs under the same prompt: reuse the earlier answer
+    cache_key = analysis_cache.cache_key(PROMPT_VERSION, linkedin, resume_text)
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     genai.configure(api_key=key)
-    model = genai.GenerativeModel("gemini-1.5-flash")
+    model = genai.GenerativeModel(MODEL)
 
     txt = PROMPT.format(linkedin=str(linkedin or {}), resume=resume_text or "")
-    resp = model.generate_content(txt)
-    out = (getattr(resp, "text", None) or "").strip()
-
-    # robust JSON extraction
-    m = re.search(r"\{[\s\S]*\}", out)
-    if m:
-        try:
-            return json.loads(m.group(0))
-        except Exception:
-            pass
-
-    # last resort: return raw text in background_summary
-    return {"background_summary": out, "tone": [], "keywords": []}
+    insights, missing = _validate(_parse(_generate(model, txt, FIELD_SPECS)))
+    if not missing:
+        M_REPLIES.inc(result="valid")
+        analysis_cache.put(cache_key, PROMPT_VERSION, insights)
+        return insights
+
+    # ask again for just the missing fields
+    log.info("analyze_profile reply missing %s; re-prompting for those fields", missing)
+    repair = REPAIR_PROMPT.format(partial=json.dumps(insights), fields=", ".join(missing),
+                                  spec="\n".join(FIELD_SPECS[f] for f in missing))
+    try:
+        patch = _parse(_generate(model, repair, missing))
+        fixed, still_missing = _validate({**insights, **{f: patch.get(f) for f in missing}})
+    except Exception as e:
+        log.warning("analyze_profile repair call failed: %s", e)
+        fixed, still_missing = insights, missing
+    if not still_missing:
+        M_REPLIES.inc(result="repaired")
+        analysis_cache.put(cache_key, PROMPT_VERSION, fixed)
+        return fixed
+
+    # still incomplete: not an answer to store, cache or copy onto the profile; let the caller retry
+    M_REPLIES.inc(result="incomplete")
+    raise IncompleteAnalysis(still_missing, fixed)
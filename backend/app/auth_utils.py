@@ -1,15 +1,85 @@
+import secrets
 import time
+from typing import Optional
 from passlib.hash import bcrypt
-from jose import jwt
-from .config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRY_MINUTES
+from jose import JWTError, jwt
+from .config import (
+    JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRY_MINUTES, OAUTH_STATE_SECRET, OAUTH_STATE_TTL_SECONDS,
+)
+from .db import get_conn, put_conn
+
+# Stored as password_hash for accounts that only sign in through LinkedIn. Not a bcrypt
+# hash, so no password can ever match it (and creating the account costs no bcrypt round).
+UNUSABLE_PASSWORD = "!linkedin-only"
 
 def hash_password(plain: str) -> str:
     return bcrypt.hash(plain)
 
 def verify_password(plain: str, hashed: str) -> bool:
+    if not hashed or hashed.startswith("!"):
+        return False
     return bcrypt.verify(plain, hashed)
 
 def create_access_token(sub: str) -> str:
     now = int(time.time())
     payload = {"sub": sub, "iat": now, "exp": now + JWT_EXPIRY_MINUTES * 60}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+# ---------- OAuth state ----------
+# The state is a signed, expiring token carrying the app user id (0 = public sign-in) and a
+# nonce, so any worker can verify the callback. Used nonces are recorded in Postgres until
+# the state expires, so a replay is refused by every worker, not just the one that saw it.
+_STATE_TYP = "li_oauth_state"
+
+def ensure_oauth_state_schema():
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS oauth_state_nonces (
+                    nonce      TEXT PRIMARY KEY,
+                    expires_at TIMESTAMPTZ NOT NULL
+                )
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS oauth_state_nonces_expires_idx
+                ON oauth_state_nonces (expires_at)
+            """)
+    finally:
+        put_conn(conn)
+
+def create_oauth_state(user_id: int) -> str:
+    now = int(time.time())
+    payload = {"typ": _STATE_TYP, "uid": user_id, "nonce": secrets.token_urlsafe(12),
+               "iat": now, "exp": now + OAUTH_STATE_TTL_SECONDS}
+    return jwt.encode(payload, OAUTH_STATE_SECRET, algorithm="HS256")
+
+def _first_use(nonce: str, exp: int) -> bool:
+    """Record `nonce` as used; False if any worker already did. Expired nonces are purged as we go."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH purged AS (
+                    DELETE FROM oauth_state_nonces WHERE expires_at < now()
+                )
+                INSERT INTO oauth_state_nonces (nonce, expires_at)
+                VALUES (%s, to_timestamp(%s))
+                ON CONFLICT (nonce) DO NOTHING
+                RETURNING nonce
+            """, (nonce, exp))
+            return cur.fetchone() is not None
+    finally:
+        put_conn(conn)
+
+def consume_oauth_state(state: str) -> Optional[int]:
+    """User id the state was issued for, or None if it is forged, expired or already used."""
+    try:
+        claims = jwt.decode(state, OAUTH_STATE_SECRET, algorithms=["HS256"])
+    except JWTError:
+        return None
+    if claims.get("typ") != _STATE_TYP or "uid" not in claims or not claims.get("nonce"):
+        return None
+    if not _first_use(claims["nonce"], int(claims["exp"])):
+        return None
+    return int(claims["uid"])
@@ -13,6 +13,10 @@ DB_PORT = env("DB_PORT", "5432")
 DB_NAME = env("DB_NAME", required=True)
 DB_USER = env("DB_USER", required=True)
 DB_PASSWORD = env("DB_PASSWORD", required=True)
+# Connections are shared by the sync route threadpool (40 threads by default) and the
+# background jobs' to_thread workers (scheduler, token sweeper, profile sync, résumé jobs)
+DB_POOL_MIN = int(env("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(env("DB_POOL_MAX", "50"))
 
 FRONTEND_ORIGIN = env("FRONTEND_ORIGIN", "http://localhost:3000")
 FRONTEND_CALLBACK_URL = env("FRONTEND_CALLBACK_URL", "http://localhost:4200/auth/linkedin")
@@ -21,6 +25,9 @@ FRONTEND_CALLBACK_URL = env("FRONTEND_CALLBACK_URL", "http://localhost:4200/auth
 JWT_SECRET = env("JWT_SECRET", required=True)
 JWT_ALGORITHM = env("JWT_ALGORITHM", "HS256")
 JWT_EXPIRY_MINUTES = int(env("JWT_EXPIRY_MINUTES", "60"))
+# OAuth `state` is a signed token; defaults to a key derived from JWT_SECRET
+OAUTH_STATE_SECRET = env("OAUTH_STATE_SECRET", "") or JWT_SECRET + ":oauth-state"
+OAUTH_STATE_TTL_SECONDS = int(env("OAUTH_STATE_TTL_SECONDS", "600"))
 LOG_LEVEL   = env("LOG_LEVEL", "INFO")
 DEV_VERBOSE = env("DEV_VERBOSE", "false").lower() == "true"
 GEMINI_API_KEY = env("GEMINI_API_KEY", "")
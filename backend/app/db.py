@@ -1,15 +1,16 @@
 import psycopg2
 from psycopg2 import pool
-from .config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+from .config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_POOL_MIN, DB_POOL_MAX
 
-_conn_pool: pool.SimpleConnectionPool | None = None
+# threaded: routes and background jobs take connections from many threads at once
+_conn_pool: pool.ThreadedConnectionPool | None = None
 
 def init_pool():
     global _conn_pool
     if _conn_pool is None:
-        _conn_pool = pool.SimpleConnectionPool(
-            minconn=1,
-            maxconn=5,
+        _conn_pool = pool.ThreadedConnectionPool(
+            minconn=DB_POOL_MIN,
+            maxconn=DB_POOL_MAX,
             host=DB_HOST,
             port=int(DB_PORT),
             dbname=DB_NAME,
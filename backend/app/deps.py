@@ -52,12 +52,13 @@ def get_current_user(authorization: str | None = Header(default=None)):
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT id, name, email FROM users WHERE id=%s AND is_active=TRUE", (user_id,))
+            cur.execute("SELECT id, name, email, updated_at FROM users WHERE id=%s AND is_active=TRUE", (user_id,))
             row = cur.fetchone()
             if not row:
                 print(f"[AUTH] ❌ No active user id={user_id}")
                 raise HTTPException(status_code=401, detail="User not found")
-            user = {"id": row[0], "name": row[1], "email": row[2]}
+            # updated_at: conditional-GET validator for /auth/me
+            user = {"id": row[0], "name": row[1], "email": row[2], "updated_at": row[3]}
             print("[AUTH] ✅ Current user:", user)
             return user
     finally:
@@ -0,0 +1,102 @@
+# app/http_cache.py
+"""
+Conditional GET for the read routes the dashboard polls.
+
+A route works out a validator before building its body. This is either a strong ETag
+over the body (body_etag) or a weak one over whatever changes whenever the body does:
+row updated_at values or a version number (version_etag). It then asks
+Conditional.check(): if the client's If-None-Match (or If-Modified-Since) is still
+current, the route returns the 304 and skips serialization, and skips its query too
+when the validator came for free.
+
+    @router.get("/thing")
+    def thing(user=Depends(get_current_user), cond: Conditional = Depends()):
+        etag = version_etag("thing", user["id"], updated_at)
+        not_modified = cond.check(etag, updated_at, route="thing")
+        if not_modified:
+            return not_modified
+        return cond.respond(build_body(), etag, updated_at)
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.metrics import Counter
+
+M_CONDITIONAL = Counter("http_conditional_get_total", "Conditional GETs by route and result", ("route", "result"))
+
+
+def body_etag(body) -> str:
+    """Strong ETag: a hash of the JSON body."""
+    raw = json.dumps(jsonable_encoder(body), sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def version_etag(*parts) -> str:
+    """Weak ETag from validators (ids, updated_at values, version counters), not from bytes."""
+    raw = "|".join("" if p is None else (p.isoformat() if isinstance(p, datetime) else str(p)) for p in parts)
+    return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:24]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def _http_date(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+class Conditional:
+    """FastAPI dependency carrying the request's validators."""
+
+    def __init__(self, if_none_match: Optional[str] = Header(default=None),
+                 if_modified_since: Optional[str] = Header(default=None)):
+        self.if_none_match = if_none_match
+        self.if_modified_since = if_modified_since
+
+    def _current(self, etag: str, last_modified: Optional[datetime]) -> bool:
+        if self.if_none_match is not None:  # If-None-Match wins over If-Modified-Since
+            return etag_matches(self.if_none_match, etag)
+        if last_modified is None or not self.if_modified_since:
+            return False
+        try:
+            since = parsedate_to_datetime(self.if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    @staticmethod
+    def headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+        h = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+        if last_modified is not None:
+            h["Last-Modified"] = _http_date(last_modified)
+        return h
+
+    def check(self, etag: str, last_modified: Optional[datetime] = None, route: str = "") -> Optional[Response]:
+        """A 304 response when the client's copy is current, else None."""
+        if self._current(etag, last_modified):
+            M_CONDITIONAL.inc(route=route, result="not_modified")
+            return Response(status_code=304, headers=self.headers(etag, last_modified))
+        M_CONDITIONAL.inc(route=route, result="full")
+        return None
+
+    def respond(self, body, etag: str, last_modified: Optional[datetime] = None) -> JSONResponse:
+        return JSONResponse(content=jsonable_encoder(body), headers=self.headers(etag, last_modified))
@@ -0,0 +1,69 @@
+# app/jobs/profile_sync.py
+"""
+Bulk LinkedIn profile refresh: every PROFILE_SYNC_SECONDS, re-fetch /v2/userinfo for the
+profiles last fetched more than PROFILE_STALE_SECONDS ago (oldest first, a bounded batch,
+a few calls at a time) and write only the ones that changed. Members whose token is
+expired or flagged needs_reauth are left to the token sweeper.
+"""
+import asyncio, os, logging
+from typing import Optional
+
+from app.db import get_conn, put_conn
+from app.services import linkedin_client, linkedin_profile
+
+SYNC_SEC = int(os.getenv("PROFILE_SYNC_SECONDS", str(6 * 3600)))  # 0 disables
+STALE_SEC = int(os.getenv("PROFILE_STALE_SECONDS", str(24 * 3600)))
+SYNC_LIMIT = int(os.getenv("PROFILE_SYNC_LIMIT", "200"))
+SYNC_CONCURRENCY = int(os.getenv("PROFILE_SYNC_CONCURRENCY", "4"))
+log = logging.getLogger("profile_sync")
+
+
+def _stale_profiles(limit: int) -> list[tuple[int, str, Optional[str]]]:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT lp.user_id, t.access_token, lp.raw_hash
+                FROM linkedin_profile lp
+                JOIN tokens_linkedin t ON t.user_id = lp.user_id
+                WHERE lp.fetched_at < now() - make_interval(secs => %s)
+                  AND NOT t.needs_reauth AND t.expires_at > now()
+                ORDER BY lp.fetched_at
+                LIMIT %s
+            """, (STALE_SEC, limit))
+            return cur.fetchall()
+    finally:
+        put_conn(conn)
+
+
+async def sync_stale_once(limit: int = SYNC_LIMIT) -> dict:
+    stale = await asyncio.to_thread(_stale_profiles, limit)
+    sem = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+    async def one(uid: int, token: str, old_hash: Optional[str]):
+        async with sem:
+            try:
+                return uid, await linkedin_client.auserinfo(token), old_hash
+            except Exception as e:
+                log.warning("Profile sync for user_id=%s failed: %s", uid, e)
+                linkedin_profile.M_SYNC.inc(result="error")
+                return None
+
+    fetched = [r for r in await asyncio.gather(*(one(*row) for row in stale)) if r]
+    written = await asyncio.to_thread(linkedin_profile.save_profiles, fetched)
+    if stale:
+        log.info("👤 Profile sync: %d stale, %d fetched, %d changed", len(stale), len(fetched), written)
+    return {"stale": len(stale), "fetched": len(fetched), "changed": written}
+
+
+async def run_profile_sync():
+    if SYNC_SEC <= 0:
+        log.info("👤 Profile sync disabled")
+        return
+    log.info("👤 Profile sync started (every %ss, stale after %ss)", SYNC_SEC, STALE_SEC)
+    while True:
+        try:
+            await sync_stale_once()
+        except Exception as e:
+            log.exception("Profile sync error: %s", e)
+        await asyncio.sleep(SYNC_SEC)
@@ -0,0 +1,253 @@
+# app/jobs/resume_analyzer.py
+"""
+Background résumé analysis.
+
+upload-resume stores the extracted text with analysis_status='queued' and returns 202;
+this loop claims queued rows (FOR UPDATE SKIP LOCKED, under a lease so a crashed worker's
+rows are picked up again), runs analyze_profile against the text and the member's
+LinkedIn snapshot a few at a time, stores the insights and copies them onto the profile.
+A heartbeat keeps in-flight leases alive. Clients poll GET /profile/resume-status/{id},
+which watch() lets wait for this process to settle a résumé instead of re-querying.
+"""
+import asyncio, json, os, socket, time, logging
+from typing import NamedTuple, Optional
+
+from app.db import get_conn, put_conn
+from app.metrics import Counter, Histogram
+from app.ai.profile_analyzer import analyze_profile
+from app.services import resume_store, summary_cache
+
+POLL_SEC = int(os.getenv("RESUME_ANALYSIS_POLL_SECONDS", "5"))
+BATCH = int(os.getenv("RESUME_ANALYSIS_BATCH", "8"))
+CONCURRENCY = int(os.getenv("RESUME_ANALYSIS_CONCURRENCY", "2"))
+LEASE_SEC = int(os.getenv("RESUME_ANALYSIS_LEASE_SECONDS", "300"))
+HEARTBEAT_SEC = int(os.getenv("RESUME_ANALYSIS_HEARTBEAT_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("RESUME_ANALYSIS_MAX_ATTEMPTS", "3"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+log = logging.getLogger("resume_analyzer")
+
+M_OUTCOMES = Counter("resume_analysis_total", "Résumé analyses finished, by result", ("result",))
+M_DURATION = Histogram("resume_analysis_seconds", "analyze_profile wall time per résumé")
+
+
+class Job(NamedTuple):
+    id: int
+    user_id: int
+    text: str
+    attempts: int
+    linkedin: Optional[dict]
+
+
+def _give_up_expired() -> list[int]:
+    """Fail lease-expired rows that already used MAX_ATTEMPTS (each crash or hang costs one)."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE resume_texts
+                SET analysis_status='failed', lease_owner=NULL, lease_expires_at=NULL,
+                    analysis_error='lease expired (gave up after ' || analysis_attempts || ' attempts)'
+                WHERE analysis_status='analyzing' AND lease_expires_at < now() AND analysis_attempts >= %s
+                RETURNING id
+            """, (MAX_ATTEMPTS,))
+            return [r[0] for r in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
+
+def _claim(limit: int) -> list[Job]:
+    """Move up to `limit` queued (or lease-expired) rows to 'analyzing' under a fresh lease."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH claimed AS (
+                    UPDATE resume_texts r
+                    SET analysis_status='analyzing',
+                        analysis_attempts=r.analysis_attempts + 1,
+                        lease_owner=%s,
+                        lease_expires_at=now() + make_interval(secs => %s)
+                    WHERE r.id IN (
+                        SELECT id FROM resume_texts
+                        WHERE analysis_status='queued'
+                           OR (analysis_status='analyzing' AND lease_expires_at < now()
+                               AND analysis_attempts < %s)
+                        ORDER BY uploaded_at
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT %s
+                    )
+                    RETURNING r.id, r.user_id, r.extracted, r.analysis_attempts
+                )
+                SELECT c.id, c.user_id, c.extracted, c.analysis_attempts, lp.raw_json
+                FROM claimed c
+                LEFT JOIN linkedin_profile lp ON lp.user_id = c.user_id
+            """, (WORKER_ID, LEASE_SEC, MAX_ATTEMPTS, limit))
+            return [Job(*row) for row in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
+
+def _renew_leases(ids: list[int]) -> None:
+    if not ids:
+        return
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE resume_texts
+                SET lease_expires_at=now() + make_interval(secs => %s)
+                WHERE id = ANY(%s) AND analysis_status='analyzing' AND lease_owner=%s
+            """, (LEASE_SEC, ids, WORKER_ID))
+    finally:
+        put_conn(conn)
+
+
+async def _heartbeat(in_flight: set[int]):
+    """Keep leases alive for résumés this worker is still analyzing."""
+    while True:
+        await asyncio.sleep(HEARTBEAT_SEC)
+        try:
+            await asyncio.to_thread(_renew_leases, list(in_flight))
+        except Exception as e:
+            log.warning("Analysis lease heartbeat failed: %s", e)
+
+
+def _finish(job: Job, insights: dict) -> None:
+    """Store the insights; copy them to the profile unless a newer résumé was uploaded meanwhile."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH done AS (
+                    UPDATE resume_texts r
+                    SET insights=%s::jsonb, analysis_status='done', analysis_error=NULL,
+                        analyzed_at=now(), lease_owner=NULL, lease_expires_at=NULL
+                    WHERE r.id=%s AND r.analysis_status='analyzing' AND r.lease_owner=%s
+                    RETURNING r.user_id, r.insights, EXISTS (
+                        SELECT 1 FROM users u WHERE u.id = r.user_id AND u.current_resume_id = r.id
+                    ) AS latest
+                )
+            """ + resume_store.profile_from_insights("done", "s.latest"), (json.dumps(insights), job.id, WORKER_ID))
+    finally:
+        put_conn(conn)
+    summary_cache.invalidate(job.user_id)
+
+
+def _fail(job: Job, error: str) -> str:
+    """Requeue for another try, or give up after MAX_ATTEMPTS. Returns the new status."""
+    status = "failed" if job.attempts >= MAX_ATTEMPTS else "queued"
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE resume_texts
+                SET analysis_status=%s, analysis_error=%s, lease_owner=NULL, lease_expires_at=NULL
+                WHERE id=%s AND analysis_status='analyzing' AND lease_owner=%s
+            """, (status, error[:500], job.id, WORKER_ID))
+    finally:
+        put_conn(conn)
+    return status
+
+
+def _run_job(job: Job) -> None:
+    t0 = time.monotonic()
+    try:
+        # an IncompleteAnalysis is retried like any failure, never stored as 'done'
+        insights = analyze_profile(job.linkedin or {}, job.text)
+    except Exception as e:
+        status = _fail(job, f"{type(e).__name__}: {e}")
+        log.warning("Résumé analysis id=%s user_id=%s failed (attempt %s, now %s): %s",
+                    job.id, job.user_id, job.attempts, status, e)
+        M_OUTCOMES.inc(result="failed" if status == "failed" else "retry")
+        return
+    M_DURATION.observe(time.monotonic() - t0)
+    _finish(job, insights)
+    M_OUTCOMES.inc(result="done")
+    log.info("Résumé analysis id=%s user_id=%s done in %.1fs", job.id, job.user_id, time.monotonic() - t0)
+
+
+_in_flight: set[int] = set()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wake_event: Optional[asyncio.Event] = None
+_watchers: dict[int, set[asyncio.Event]] = {}  # résumé id -> events of waiting status requests
+
+
+def watch(resume_id: int) -> asyncio.Event:
+    """
+    Event set when this process next changes `resume_id`'s analysis status. Register it
+    before reading the status so no change is missed; unwatch() it when done. Call from
+    the event loop.
+    """
+    event = asyncio.Event()
+    _watchers.setdefault(resume_id, set()).add(event)
+    return event
+
+
+def unwatch(resume_id: int, event: asyncio.Event) -> None:
+    events = _watchers.get(resume_id)
+    if events is not None:
+        events.discard(event)
+        if not events:
+            del _watchers[resume_id]
+
+
+def _notify(ids) -> None:
+    for resume_id in ids:
+        for event in _watchers.get(resume_id, ()):
+            event.set()
+
+
+def wake() -> None:
+    """Cut the current poll sleep short (a résumé was just queued). Thread-safe."""
+    if _loop is not None and _wake_event is not None:
+        _loop.call_soon_threadsafe(_wake_event.set)
+
+
+async def _idle(seconds: float) -> None:
+    try:
+        await asyncio.wait_for(_wake_event.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+    _wake_event.clear()
+
+
+async def tick() -> int:
+    """Claim a batch and analyze it. Returns how many résumés were claimed."""
+    gave_up = await asyncio.to_thread(_give_up_expired)
+    if gave_up:
+        log.warning("Résumé analysis gave up on expired leases: ids=%s", gave_up)
+        M_OUTCOMES.inc(len(gave_up), result="failed")
+        _notify(gave_up)
+    jobs = await asyncio.to_thread(_claim, BATCH)
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(job: Job):
+        async with sem:
+            try:
+                await asyncio.to_thread(_run_job, job)
+            finally:
+                _in_flight.discard(job.id)
+                _notify((job.id,))
+
+    _in_flight.update(j.id for j in jobs)
+    await asyncio.gather(*(one(j) for j in jobs))
+    return len(jobs)
+
+
+async def run_resume_analyzer():
+    log.info("📄 Résumé analyzer started (poll=%ss, batch=%s, concurrency=%s, worker=%s)",
+             POLL_SEC, BATCH, CONCURRENCY, WORKER_ID)
+    global _loop, _wake_event
+    _loop, _wake_event = asyncio.get_running_loop(), asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(_in_flight))
+    try:
+        while True:
+            try:
+                claimed = await tick()
+            except Exception as e:
+                log.exception("Résumé analyzer error: %s", e)
+                claimed = 0
+            if claimed < BATCH:
+                await _idle(POLL_SEC)
+    finally:
+        heartbeat.cancel()
@@ -0,0 +1,96 @@
+# app/jobs/resume_compactor.py
+"""
+résumé history retention: keep each user's RESUME_KEEP_PER_USER newest uploads, delete
+the rest.
+
+Reads only ever use users.current_resume_id, so older rows are dead weight in
+resume_texts and its TOAST table. Every RESUME_COMPACT_SECONDS this loop collects the
+superseded ids in one read, then deletes them in batches of RESUME_COMPACT_BATCH. Each
+batch is its own short transaction and skips rows another transaction holds (FOR UPDATE
+SKIP LOCKED), so uploads never wait on it. The current résumé and rows still queued or
+being analyzed are never deleted.
+"""
+import asyncio, os, logging
+
+from app.db import get_conn, put_conn
+from app.metrics import Counter
+
+COMPACT_SEC = int(os.getenv("RESUME_COMPACT_SECONDS", "3600"))  # 0 disables
+KEEP_PER_USER = max(1, int(os.getenv("RESUME_KEEP_PER_USER", "3")))
+BATCH = int(os.getenv("RESUME_COMPACT_BATCH", "200"))
+MAX_BATCHES = int(os.getenv("RESUME_COMPACT_MAX_BATCHES", "50"))  # per pass; the rest waits for the next one
+PAUSE_SEC = float(os.getenv("RESUME_COMPACT_PAUSE_SECONDS", "0.2"))  # between batches
+log = logging.getLogger("resume_compactor")
+
+M_PRUNED = Counter("resume_texts_pruned_total", "Old résumé rows deleted by the compactor")
+
+
+def _superseded(keep: int, limit: int) -> list[int]:
+    """Ids beyond each user's `keep` newest uploads (one read, no locks)."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY uploaded_at DESC, id DESC) AS rn
+                    FROM resume_texts
+                    WHERE user_id IN (
+                        SELECT user_id FROM resume_texts GROUP BY user_id HAVING count(*) > %s
+                    )
+                ) ranked
+                WHERE rn > %s
+                LIMIT %s
+            """, (keep, keep, limit))
+            return [r[0] for r in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
+
+def _delete_batch(ids: list[int]) -> int:
+    """
+    Delete `ids`, re-checking under the row lock. A re-uploaded old résumé becomes current
+    (and newest); uploads only ever push other rows further down.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH doomed AS (
+                    SELECT r.id FROM resume_texts r
+                    WHERE r.id = ANY(%s)
+                      AND r.analysis_status NOT IN ('queued', 'analyzing')
+                      AND NOT EXISTS (SELECT 1 FROM users u WHERE u.current_resume_id = r.id)
+                    FOR UPDATE OF r SKIP LOCKED
+                )
+                DELETE FROM resume_texts r USING doomed d WHERE r.id = d.id
+            """, (ids,))
+            return cur.rowcount
+    finally:
+        put_conn(conn)
+
+
+async def compact_once(keep: int = KEEP_PER_USER) -> int:
+    """Delete up to BATCH * MAX_BATCHES superseded résumés, a batch at a time. Returns rows deleted."""
+    ids = await asyncio.to_thread(_superseded, keep, BATCH * MAX_BATCHES)
+    total = 0
+    for i in range(0, len(ids), BATCH):
+        n = await asyncio.to_thread(_delete_batch, ids[i:i + BATCH])
+        total += n
+        M_PRUNED.inc(n)
+        await asyncio.sleep(PAUSE_SEC)
+    if total:
+        log.info("🗜️ Résumé compaction: %d old rows deleted (keeping %d per user)", total, keep)
+    return total
+
+
+async def run_resume_compactor():
+    if COMPACT_SEC <= 0:
+        log.info("🗜️ Résumé compactor disabled")
+        return
+    log.info("🗜️ Résumé compactor started (every %ss, keep %d per user)", COMPACT_SEC, KEEP_PER_USER)
+    while True:
+        try:
+            await compact_once()
+        except Exception as e:
+            log.exception("Résumé compaction error: %s", e)
+        await asyncio.sleep(COMPACT_SEC)
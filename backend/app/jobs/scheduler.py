@@ -1,156 +1,494 @@
 # app/jobs/scheduler.py
-import asyncio, os, logging
+import asyncio, os, socket, time, logging
+from datetime import datetime, timezone, timedelta
+from typing import NamedTuple, Optional
 from app.db import get_conn, put_conn
-from app.services.linkedin_publish import publish_to_linkedin
-from app.routes.content import _get_li_token_and_id  # reuse token/id helper
+from app.metrics import Counter, Gauge, Histogram, RateWindow
+from app.services import linkedin_client, publish_admission
+from app.services.linkedin_client import LinkedInError, LinkedInUnavailable
+from app.services.linkedin_publish import (
+    IN_FLIGHT_SEC, PublishInProgress, PublishOutcomeUnknown, post_key, publish_once, scheduled_key,
+)
 import requests
 
 POLL_SEC = int(os.getenv("SCHEDULER_POLL_SECONDS", "10"))
 BATCH = int(os.getenv("SCHEDULER_BATCH_LIMIT", "10"))
+# A claimed job belongs to this worker until lease_expires_at; the heartbeat keeps
+# pushing it forward while the publish is in flight, the reaper recovers it otherwise.
+LEASE_SEC = int(os.getenv("SCHEDULER_LEASE_SECONDS", "120"))
+HEARTBEAT_SEC = int(os.getenv("SCHEDULER_HEARTBEAT_SECONDS", "30"))
+MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "5"))
+CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "4"))
+BACKLOG_SAMPLE_SEC = int(os.getenv("SCHEDULER_BACKLOG_SAMPLE_SECONDS", "15"))
+# publish-now jobs jump ahead of everything that is merely due
+PRIORITY_IMMEDIATE = 10
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+IST = timezone(timedelta(hours=5, minutes=30))
 log = logging.getLogger("scheduler")
 
-async def run_scheduled_poster():
+
+def _wall_clock() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# "Which posts are due" and publish lag are judged against this clock; the benchmark
+# swaps in a simulated one. Leases always run on the database's real now().
+_clock = _wall_clock
+
+
+def set_clock(fn) -> None:
+    global _clock
+    _clock = fn or _wall_clock
+
+# ----- metrics (exposed via GET /metrics) -----
+M_BACKLOG = Gauge("scheduler_backlog", "scheduled_posts waiting to be published", ("state",))
+M_OLDEST_DUE = Gauge("scheduler_oldest_due_age_seconds", "Age of the oldest due-but-unpublished post")
+M_LAG = Histogram("scheduler_publish_lag_seconds", "Delay between scheduled_at and the actual publish")
+M_OUTCOMES = Counter("scheduler_jobs_total", "Scheduled jobs finished, by final status", ("status",))
+M_FAILURES = Counter("scheduler_publish_failures_total", "Failed LinkedIn publishes by failure class", ("code",))
+M_RATE = RateWindow("scheduler_publishes_per_second", "Successful publishes per second (1 min window)")
+
+
+def _failure_class(e: Exception) -> str:
+    if isinstance(e, LinkedInUnavailable):
+        return "circuit_open"
+    if isinstance(e, PublishInProgress):
+        return "in_progress"
+    if isinstance(e, PublishOutcomeUnknown):
+        return "outcome_unknown"
+    if isinstance(e, LinkedInError):
+        return str(e.status_code)
+    if isinstance(e, requests.Timeout):
+        return "timeout"
+    if isinstance(e, requests.ConnectionError):
+        return "connection"
+    return "error"
+
+# Claimed rows come back joined with the author's token and li_id, so a job never
+# needs its own round trips to tokens_linkedin / linkedin_profile.
+_WITH_CREDENTIALS_AND_MEDIA = """
+    SELECT c.*, t.access_token, t.expires_at, lp.li_id, p.media_assets
+    FROM claimed c
+    LEFT JOIN tokens_linkedin t ON t.user_id = c.user_id
+    LEFT JOIN linkedin_profile lp ON lp.user_id = c.user_id
+    LEFT JOIN posts p ON p.id = c.post_id
+"""
+
+
+def ensure_schema():
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                ALTER TABLE scheduled_posts
+                  ADD COLUMN IF NOT EXISTS post_id BIGINT,
+                  ADD COLUMN IF NOT EXISTS visibility VARCHAR(20),
+                  ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0,
+                  ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+                  ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ,
+                  ADD COLUMN IF NOT EXISTS publish_started_at TIMESTAMPTZ,
+                  ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0,
+                  ADD COLUMN IF NOT EXISTS linkedin_urn TEXT,
+                  ADD COLUMN IF NOT EXISTS last_error TEXT,
+                  ADD COLUMN IF NOT EXISTS not_before TIMESTAMPTZ
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS scheduled_posts_due_idx
+                ON scheduled_posts (scheduled_at) WHERE status='queued'
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS scheduled_posts_claim_idx
+                ON scheduled_posts (priority DESC, scheduled_at) WHERE status='queued'
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS scheduled_posts_post_idx
+                ON scheduled_posts (post_id) WHERE post_id IS NOT NULL
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS scheduled_posts_lease_idx
+                ON scheduled_posts (lease_expires_at) WHERE status='posting'
+            """)
+            # rows stranded in 'posting' before leases existed: hand them to the reaper
+            cur.execute("""
+                UPDATE scheduled_posts SET lease_expires_at=now()
+                WHERE status='posting' AND lease_expires_at IS NULL
+            """)
+    finally:
+        put_conn(conn)
+
+
+class Job(NamedTuple):
+    id: int
+    user_id: int
+    text: str
+    scheduled_at: Optional[datetime]
+    post_id: Optional[int]
+    visibility: Optional[str]
+    priority: int
+    attempts: int  # including this one
+    access_token: Optional[str]
+    expires_at: Optional[datetime]
+    li_id: Optional[str]
+    media: Optional[list[str]]  # image asset URNs attached to the post
+
+
+def _claim_due_jobs(limit: int) -> list[Job]:
+    """Atomically move up to `limit` due jobs to 'posting' under a lease owned by this worker."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH claimed AS (
+                UPDATE scheduled_posts sp
+                SET status='posting',
+                    lease_owner=%s,
+                    lease_expires_at=now() + make_interval(secs => %s),
+                    publish_started_at=NULL,
+                    attempts=sp.attempts + 1,
+                    updated_at=now()
+                WHERE sp.id IN (
+                    SELECT id FROM scheduled_posts
+                    WHERE status='queued' AND scheduled_at <= %s
+                      AND (not_before IS NULL OR not_before <= now())
+                    ORDER BY priority DESC, scheduled_at ASC
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING sp.id, sp.user_id, sp.text, sp.scheduled_at, sp.post_id, sp.visibility, sp.priority, sp.attempts
+                )
+            """ + _WITH_CREDENTIALS_AND_MEDIA, (WORKER_ID, LEASE_SEC, _clock(), limit))
+            return [Job(*row) for row in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
+
+def _renew_leases(ids: list[int]) -> None:
+    if not ids:
+        return
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scheduled_posts
+                SET lease_expires_at=now() + make_interval(secs => %s)
+                WHERE id = ANY(%s) AND status='posting' AND lease_owner=%s
+            """, (LEASE_SEC, ids, WORKER_ID))
+    finally:
+        put_conn(conn)
+
+
+async def _heartbeat(in_flight: set[int]):
+    """Keep leases alive for jobs this worker is still publishing."""
     while True:
+        await asyncio.sleep(HEARTBEAT_SEC)
         try:
-            # fetch due jobs
-            conn = get_conn()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT id, user_id, text
-                        FROM scheduled_posts
-                        WHERE status='queued' AND scheduled_at <= now()
-                        ORDER BY scheduled_at ASC
-                        LIMIT %s
-                    """, (BATCH,))
-                    jobs = cur.fetchall()
-            finally:
-                put_conn(conn)
-
-            if not jobs:
-                await asyncio.sleep(POLL_SEC)
-                continue
-
-            for sp_id, user_id, text in jobs:
-                try:
-                    # mark posting
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='posting', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-
-                    urn = publish_to_linkedin(user_id, text)
-
-                    # mark posted
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='posted', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-
-                    log.info("✅ Posted scheduled_post id=%s urn=%s", sp_id, urn)
-
-                except Exception as e:
-                    # mark failed
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='failed', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-                    log.exception("❌ Failed scheduled_post id=%s: %s", sp_id, e)
-
-        except Exception as outer:
-            log.exception("Scheduler loop error: %s", outer)
-
-        await asyncio.sleep(POLL_SEC)
-
-def _publish_to_linkedin(uid: int, text: str, visibility: str = "PUBLIC") -> str:
-    access_token, li_id = _get_li_token_and_id(uid)
-    author_urn = f"urn:li:person:{li_id}"
-    url = "https://api.linkedin.com/v2/ugcPosts"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "X-Restli-Protocol-Version": "2.0.0",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "author": author_urn,
-        "lifecycleState": "PUBLISHED",
-        "specificContent": {
-            "com.linkedin.ugc.ShareContent": {
-                "shareCommentary": {"text": text},
-                "shareMediaCategory": "NONE",
-            }
-        },
-        "visibility": {
-            "com.linkedin.ugc.MemberNetworkVisibility": visibility
-        },
-    }
-    r = requests.post(url, headers=headers, json=body, timeout=20)
-    if r.status_code not in (200, 201):
-        raise RuntimeError(f"LinkedIn publish failed: {r.status_code} {r.text}")
-    return r.headers.get("x-restli-id") or r.headers.get("location", "")
+            await asyncio.to_thread(_renew_leases, list(in_flight))
+        except Exception as e:
+            log.warning("Lease heartbeat failed: %s", e)
+
+
+def _mark_publish_started(ids: list[int]) -> set[int]:
+    """Stamp the batch right before the HTTP calls; returns the ids we still hold the lease on."""
+    if not ids:
+        return set()
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scheduled_posts SET publish_started_at=now()
+                WHERE id = ANY(%s) AND status='posting' AND lease_owner=%s
+                RETURNING id
+            """, (ids, WORKER_ID))
+            return {r[0] for r in cur.fetchall()}
+    finally:
+        put_conn(conn)
+
+
+class Outcome(NamedTuple):
+    """A job's final transition. retry_in > 0 requeues it behind not_before, and gives its
+    attempt back unless `charged` (rate limited or busy is not a failed try)."""
+    id: int
+    status: str
+    urn: Optional[str] = None
+    error: Optional[str] = None
+    retry_in: float = 0
+    charged: bool = False
+
+
+def _flush_outcomes(outcomes: list[Outcome]) -> None:
+    """Write every final transition of a batch (posted/failed/queued/needs_reauth) in one UPDATE."""
+    if not outcomes:
+        return
+    ids, statuses, urns, errors, retry_ins, charged = (list(col) for col in zip(*outcomes))
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scheduled_posts sp
+                SET status=v.status,
+                    linkedin_urn=COALESCE(v.urn, sp.linkedin_urn),
+                    last_error=v.error,
+                    lease_owner=NULL,
+                    lease_expires_at=NULL,
+                    not_before=CASE WHEN v.retry_in > 0 THEN now() + make_interval(secs => v.retry_in) END,
+                    attempts=sp.attempts - CASE WHEN v.retry_in > 0 AND NOT v.charged THEN 1 ELSE 0 END,
+                    updated_at=now()
+                FROM unnest(%s::bigint[], %s::text[], %s::text[], %s::text[], %s::float8[], %s::bool[])
+                     AS v(id, status, urn, error, retry_in, charged)
+                WHERE sp.id = v.id AND sp.lease_owner=%s
+                RETURNING sp.id
+            """, (ids, statuses, urns, errors, retry_ins, charged, WORKER_ID))
+            written = [r[0] for r in cur.fetchall()]
+            # publish-now jobs carry their post; mirror the final state onto it for status polling
+            cur.execute("""
+                UPDATE posts p
+                SET status=sp.status,
+                    linkedin_urn=COALESCE(sp.linkedin_urn, p.linkedin_urn),
+                    published_at=CASE WHEN sp.status='posted' THEN now() ELSE p.published_at END
+                FROM scheduled_posts sp
+                WHERE sp.id = ANY(%s) AND sp.post_id = p.id AND sp.priority = %s
+                  AND sp.status IN ('posted', 'failed', 'needs_reauth')
+            """, (written, PRIORITY_IMMEDIATE))
+    finally:
+        put_conn(conn)
+    written_ids = set(written)
+    for sp_id, status, _urn, _err, retry_in, _charged in outcomes:
+        M_OUTCOMES.inc(status="deferred" if retry_in > 0 else status)
+        if sp_id not in written_ids:
+            log.warning("Lease lost before finishing scheduled_post id=%s (wanted %s)", sp_id, status)
+
+
+def _credential_problem(access_token, expires_at, li_id) -> tuple[str, str] | None:
+    """(status, error) when a job can't be published with the joined credentials, else None."""
+    if not access_token:
+        return "needs_reauth", "LinkedIn not connected"
+    # normalize legacy naive timestamps
+    if isinstance(expires_at, datetime) and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=IST)
+    if expires_at and expires_at < datetime.now(IST):
+        return "needs_reauth", "LinkedIn token expired. Reconnect."
+    if not li_id:
+        return "failed", "No LinkedIn profile li_id stored"
+    return None
+
+
+def _claim_expired_leases(limit: int) -> list:
+    """Take over rows whose owner stopped heartbeating (crash, deploy, hung publish)."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scheduled_posts sp
+                SET lease_owner=%s,
+                    lease_expires_at=now() + make_interval(secs => %s),
+                    updated_at=now()
+                WHERE sp.id IN (
+                    SELECT id FROM scheduled_posts
+                    WHERE status='posting' AND (lease_expires_at IS NULL OR lease_expires_at < now())
+                    ORDER BY lease_expires_at ASC NULLS FIRST
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING sp.id, sp.publish_started_at, sp.linkedin_urn, sp.attempts
+            """, (WORKER_ID, LEASE_SEC, limit))
+            return cur.fetchall()
+    finally:
+        put_conn(conn)
+
+
+def _requeue(sp_id: int, attempts: int, error: str, retry_in: float = 0) -> Outcome:
+    """Try again (after retry_in seconds), spending the attempt; fail once MAX_ATTEMPTS are used."""
+    if attempts >= MAX_ATTEMPTS:
+        return Outcome(sp_id, "failed", None, f"{error} (gave up after {attempts} attempts)")
+    return Outcome(sp_id, "queued", None, error, retry_in, charged=True)
+
+
+def reap_expired_leases(limit: int = BATCH) -> int:
+    """
+    Recover jobs stuck in 'posting' by requeueing them. Jobs that died mid-publish are safe
+    to retry: publish_once() finds the stale attempt for their key and checks LinkedIn for
+    the post before publishing again, so a crash after a successful publish can't double post.
+    """
+    rows = _claim_expired_leases(limit)
+    outcomes: list[Outcome] = []
+    for sp_id, started_at, urn, attempts in rows:
+        if urn:
+            outcomes.append(Outcome(sp_id, "posted", urn, None, 0))
+            log.info("♻️ Reaped scheduled_post id=%s: already posted urn=%s", sp_id, urn)
+            continue
+        reason = "lease expired before publish" if started_at is None else "lease expired mid-publish"
+        outcomes.append(_requeue(sp_id, attempts, reason))
+        log.info("♻️ Reaped scheduled_post id=%s: requeued (%s)", sp_id, reason)
+    _flush_outcomes(outcomes)
+    return len(rows)
+
+
+def _run_job(job: Job, wait: float = 0) -> Outcome:
+    sp_id, scheduled_at = job.id, job.scheduled_at
+    if wait > 0:
+        time.sleep(wait)  # our admission slot is slightly in the future
+    # a publish-now job shares its post's key, so the inline path and the queue can't both post it;
+    # a scheduled row is its own publish (the same draft may be scheduled, or rescheduled, again)
+    immediate = job.post_id and job.priority == PRIORITY_IMMEDIATE
+    key = post_key(job.post_id) if immediate else scheduled_key(sp_id)
+    try:
+        urn = publish_once(key, job.user_id, job.access_token, job.li_id, job.text,
+                           job.visibility or "PUBLIC", job.media or None)
+    except (LinkedInUnavailable, PublishInProgress) as e:
+        # LinkedIn is degraded (or another attempt is live); the post is fine. Come back once
+        # the breaker may have closed / the other attempt is over, without spending an attempt.
+        M_FAILURES.inc(code=_failure_class(e))
+        wait = e.retry_after if isinstance(e, LinkedInUnavailable) else IN_FLIGHT_SEC
+        retry_in = publish_admission.jittered(max(1.0, wait))
+        log.warning("⏸️ Requeued scheduled_post id=%s, retry in %.0fs: %s", sp_id, retry_in, e)
+        return Outcome(sp_id, "queued", None, str(e)[:1000], retry_in)
+    except PublishOutcomeUnknown as e:
+        # LinkedIn may have the post; the next attempt looks it up before publishing again
+        M_FAILURES.inc(code=_failure_class(e))
+        log.warning("❔ Outcome unknown for scheduled_post id=%s (attempt %s): %s", sp_id, job.attempts, e)
+        return _requeue(sp_id, job.attempts, str(e)[:1000], publish_admission.jittered(IN_FLIGHT_SEC))
+    except LinkedInError as e:
+        M_FAILURES.inc(code=_failure_class(e))
+        if e.status_code == 429:
+            # publish_once already blocked this member's bucket; come back after Retry-After
+            retry_in = publish_admission.jittered(publish_admission.retry_after_seconds(e.headers))
+            log.warning("⏸️ Throttled scheduled_post id=%s, retry in %.0fs", sp_id, retry_in)
+            return Outcome(sp_id, "queued", None, str(e)[:1000], retry_in)
+        log.exception("❌ Failed scheduled_post id=%s: %s", sp_id, e)
+        return Outcome(sp_id, "failed", None, str(e)[:1000], 0)
+    except Exception as e:
+        M_FAILURES.inc(code=_failure_class(e))
+        log.exception("❌ Failed scheduled_post id=%s: %s", sp_id, e)
+        return Outcome(sp_id, "failed", None, str(e)[:1000], 0)
+    if isinstance(scheduled_at, datetime):
+        if scheduled_at.tzinfo is None:
+            scheduled_at = scheduled_at.replace(tzinfo=IST)
+        M_LAG.observe(max(0.0, (_clock() - scheduled_at).total_seconds()))
+    M_RATE.mark()
+    log.info("✅ Posted scheduled_post id=%s urn=%s", sp_id, urn)
+    return Outcome(sp_id, "posted", urn, None, 0)
+
+
+async def _run_batch(jobs: list[Job]) -> None:
+    """Publish one claimed batch concurrently and write all outcomes with a single UPDATE."""
+    outcomes: list[Outcome] = []
+    runnable = []
+    for job in jobs:
+        problem = _credential_problem(job.access_token, job.expires_at, job.li_id)
+        if problem:
+            # no point calling LinkedIn just to collect a 401
+            outcomes.append(Outcome(job.id, problem[0], None, problem[1], 0))
+            log.warning("⏭️ Skipped scheduled_post id=%s: %s", job.id, problem[1])
+            continue
+        # member + app token buckets: a burst of jobs due at 09:00 is spread out, not fired at once
+        admitted, wait = publish_admission.reserve(job.user_id)
+        if admitted:
+            runnable.append((job, wait))
+        else:
+            outcomes.append(Outcome(job.id, "queued", None, "rate limited", publish_admission.jittered(wait)))
+
+    owned = await asyncio.to_thread(_mark_publish_started, [j.id for j, _w in runnable])
+    for job, _wait in runnable:
+        if job.id not in owned:
+            log.warning("Lease lost before publishing scheduled_post id=%s", job.id)
+
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(job, wait):
+        async with sem:
+            return await asyncio.to_thread(_run_job, job, wait)
+
+    outcomes += await asyncio.gather(*(one(j, w) for j, w in runnable if j.id in owned))
+    await asyncio.to_thread(_flush_outcomes, outcomes)
+
+
+def _sample_backlog() -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            now = _clock()
+            cur.execute("""
+                SELECT count(*),
+                       count(*) FILTER (WHERE scheduled_at <= %s),
+                       COALESCE(EXTRACT(EPOCH FROM %s - min(scheduled_at) FILTER (WHERE scheduled_at <= %s)), 0)
+                FROM scheduled_posts WHERE status='queued'
+            """, (now, now, now))
+            queued, due, oldest = cur.fetchone()
+            cur.execute("SELECT count(*) FROM scheduled_posts WHERE status='posting'")
+            posting = cur.fetchone()[0]
+    finally:
+        put_conn(conn)
+    M_BACKLOG.set(queued, state="queued")
+    M_BACKLOG.set(due, state="due")
+    M_BACKLOG.set(posting, state="posting")
+    M_OLDEST_DUE.set(float(oldest))
+
+
+_in_flight: set[int] = set()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wake_event: Optional[asyncio.Event] = None
+
+
+def wake() -> None:
+    """Cut the current poll sleep short (e.g. a publish-now job was just queued). Thread-safe."""
+    if _loop is not None and _wake_event is not None:
+        _loop.call_soon_threadsafe(_wake_event.set)
+
+
+async def _idle(seconds: float) -> None:
+    try:
+        await asyncio.wait_for(_wake_event.wait(), seconds)
+    except asyncio.TimeoutError:
+        pass
+    _wake_event.clear()
+
+
+async def tick() -> int:
+    """One scheduler pass: reap expired leases, claim a due batch, publish it. Returns jobs claimed."""
+    # 0) recover jobs stranded by a dead worker
+    await asyncio.to_thread(reap_expired_leases)
+
+    # 1) claim due jobs under a lease (not while LinkedIn's breaker is open)
+    if linkedin_client.is_open("ugcPosts"):
+        return 0
+    # don't claim a batch the app-wide bucket would only defer; let it refill first
+    app_wait = publish_admission.app_wait()
+    if app_wait > 0:
+        await asyncio.sleep(min(app_wait, POLL_SEC))
+    jobs = await asyncio.to_thread(_claim_due_jobs, BATCH)
+    if not jobs:
+        return 0
+
+    # 2) publish off the event loop so the heartbeat keeps the batch leased
+    _in_flight.update(j.id for j in jobs)
+    try:
+        await _run_batch(jobs)
+    finally:
+        _in_flight.difference_update(j.id for j in jobs)
+    return len(jobs)
+
 
 async def run_scheduled_poster():
-    log.info("📆 Scheduler started (poll=%ss, batch=%s)", POLL_SEC, BATCH)
-    while True:
-        try:
-            # 1) fetch due jobs
-            conn = get_conn()
+    log.info("📆 Scheduler started (poll=%ss, batch=%s, lease=%ss, worker=%s)",
+             POLL_SEC, BATCH, LEASE_SEC, WORKER_ID)
+    global _loop, _wake_event
+    _loop, _wake_event = asyncio.get_running_loop(), asyncio.Event()
+
+    heartbeat = asyncio.create_task(_heartbeat(_in_flight))
+    last_sample = 0.0
+    try:
+        while True:
             try:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT id, user_id, text
-                        FROM scheduled_posts
-                        WHERE status='queued' AND scheduled_at <= now()
-                        ORDER BY scheduled_at ASC
-                        LIMIT %s
-                    """, (BATCH,))
-                    jobs = cur.fetchall()
-            finally:
-                put_conn(conn)
-
-            if not jobs:
-                await asyncio.sleep(POLL_SEC)
-                continue
-
-            for sp_id, user_id, text in jobs:
-                try:
-                    # mark posting
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='posting', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-
-                    urn = _publish_to_linkedin(user_id, text)
-
-                    # mark posted
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='posted', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-
-                    log.info("✅ Posted scheduled_post id=%s urn=%s", sp_id, urn)
-
-                except Exception as e:
-                    # mark failed
-                    conn = get_conn()
-                    try:
-                        with conn, conn.cursor() as cur:
-                            cur.execute("UPDATE scheduled_posts SET status='failed', updated_at=now() WHERE id=%s", (sp_id,))
-                    finally:
-                        put_conn(conn)
-                    log.exception("❌ Failed scheduled_post id=%s: %s", sp_id, e)
-
-        except Exception as outer:
-            log.exception("Scheduler loop error: %s", outer)
-
-        await asyncio.sleep(POLL_SEC)
+                if time.monotonic() - last_sample >= BACKLOG_SAMPLE_SEC:
+                    last_sample = time.monotonic()
+                    await asyncio.to_thread(_sample_backlog)
+
+                if await tick():
+                    continue  # keep draining while there is a backlog
+
+            except Exception as outer:
+                log.exception("Scheduler loop error: %s", outer)
+
+            await _idle(POLL_SEC)
+    finally:
+        heartbeat.cancel()
@@ -0,0 +1,191 @@
+# app/jobs/token_sweeper.py
+"""
+Keeps LinkedIn tokens ahead of their expiry.
+
+Every TOKEN_SWEEP_SECONDS one indexed scan picks the tokens expiring within
+TOKEN_REFRESH_AHEAD_SECONDS. Tokens with a usable refresh token are refreshed, a few at a
+time, and written back in one UPDATE. The rest are flagged needs_reauth. Queued posts
+due after a flagged token expires are moved to 'needs_reauth' now, so the user sees it
+days in advance and the scheduler never spends attempts on them. Signing in again
+clears the flag and requeues those posts (see oauth_linkedin).
+"""
+import asyncio, os, logging
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from app.db import get_conn, put_conn
+from app.metrics import Counter, Gauge
+from app.services import linkedin_client
+from app.services.linkedin_client import LinkedInError, LinkedInUnavailable
+
+SWEEP_SEC = int(os.getenv("TOKEN_SWEEP_SECONDS", "900"))
+REFRESH_AHEAD_SEC = int(os.getenv("TOKEN_REFRESH_AHEAD_SECONDS", str(7 * 24 * 3600)))
+SWEEP_LIMIT = int(os.getenv("TOKEN_SWEEP_LIMIT", "500"))
+REFRESH_CONCURRENCY = int(os.getenv("TOKEN_REFRESH_CONCURRENCY", "4"))
+CLIENT_ID = os.getenv("LINKEDIN_CLIENT_ID")
+CLIENT_SECRET = os.getenv("LINKEDIN_CLIENT_SECRET")
+REAUTH_ERROR = "LinkedIn token expires before this post is due. Reconnect LinkedIn."
+log = logging.getLogger("token_sweeper")
+
+M_REFRESH = Counter("linkedin_token_refresh_total", "Token refresh attempts by result", ("result",))
+M_REAUTH_TOKENS = Gauge("linkedin_tokens_needing_reauth", "Tokens that can't be renewed without the user")
+M_REAUTH_POSTS = Counter("scheduler_posts_marked_needs_reauth_total",
+                         "Queued posts moved to needs_reauth ahead of their publish time")
+
+
+def ensure_schema():
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                ALTER TABLE tokens_linkedin
+                  ADD COLUMN IF NOT EXISTS refresh_token TEXT,
+                  ADD COLUMN IF NOT EXISTS refresh_expires_at TIMESTAMPTZ,
+                  ADD COLUMN IF NOT EXISTS needs_reauth BOOLEAN NOT NULL DEFAULT FALSE
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS tokens_linkedin_expiry_idx
+                ON tokens_linkedin (expires_at) WHERE NOT needs_reauth
+            """)
+    finally:
+        put_conn(conn)
+
+
+class Expiring(NamedTuple):
+    user_id: int
+    expires_at: Optional[datetime]
+    refresh_token: Optional[str]
+    refresh_expires_at: Optional[datetime]
+
+
+def _expiring_tokens() -> list[Expiring]:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id, expires_at, refresh_token, refresh_expires_at
+                FROM tokens_linkedin
+                WHERE NOT needs_reauth AND expires_at < now() + make_interval(secs => %s)
+                ORDER BY expires_at
+                LIMIT %s
+            """, (REFRESH_AHEAD_SEC, SWEEP_LIMIT))
+            return [Expiring(*row) for row in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
+
+def _refreshable(t: Expiring) -> bool:
+    if not t.refresh_token or not CLIENT_ID or not CLIENT_SECRET:
+        return False
+    return t.refresh_expires_at is None or t.refresh_expires_at > datetime.now(timezone.utc)
+
+
+# (user_id, access_token, expires_in, refresh_token or None, refresh_expires_in or None)
+Refreshed = tuple[int, str, int, Optional[str], Optional[int]]
+
+
+def _refresh_one(t: Expiring) -> tuple[int, Optional[Refreshed], bool]:
+    """(user_id, refreshed, give_up): give_up=True when LinkedIn rejected the refresh token."""
+    try:
+        tok = linkedin_client.refresh_access_token(t.refresh_token, CLIENT_ID, CLIENT_SECRET)
+    except LinkedInUnavailable as e:
+        log.warning("Token refresh for user_id=%s postponed: %s", t.user_id, e)
+        M_REFRESH.inc(result="postponed")
+        return t.user_id, None, False
+    except LinkedInError as e:
+        give_up = e.status_code in (400, 401)  # invalid_grant: revoked or expired refresh token
+        log.warning("Token refresh for user_id=%s failed: %s", t.user_id, e)
+        M_REFRESH.inc(result="rejected" if give_up else "error")
+        return t.user_id, None, give_up
+    except Exception as e:
+        log.warning("Token refresh for user_id=%s failed: %s", t.user_id, e)
+        M_REFRESH.inc(result="error")
+        return t.user_id, None, False
+    M_REFRESH.inc(result="ok")
+    return t.user_id, (t.user_id, tok["access_token"], int(tok.get("expires_in") or 3600),
+                       tok.get("refresh_token"), tok.get("refresh_token_expires_in")), False
+
+
+def _save_refreshed(rows: list[Refreshed]) -> None:
+    if not rows:
+        return
+    uids, tokens, expires_in, refresh, refresh_in = (list(col) for col in zip(*rows))
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE tokens_linkedin t
+                SET access_token=v.token,
+                    expires_at=now() + make_interval(secs => v.expires_in),
+                    refresh_token=COALESCE(v.refresh, t.refresh_token),
+                    refresh_expires_at=CASE WHEN v.refresh_in IS NULL THEN t.refresh_expires_at
+                                            ELSE now() + make_interval(secs => v.refresh_in) END,
+                    needs_reauth=FALSE,
+                    updated_at=now()
+                FROM unnest(%s::int[], %s::text[], %s::int[], %s::text[], %s::int[])
+                     AS v(user_id, token, expires_in, refresh, refresh_in)
+                WHERE t.user_id = v.user_id
+            """, (uids, tokens, expires_in, refresh, refresh_in))
+    finally:
+        put_conn(conn)
+
+
+def _flag_and_sweep_posts(user_ids: list[int]) -> int:
+    """Flag `user_ids` as needing reauth, then move every flagged user's doomed queued posts."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            if user_ids:
+                cur.execute("""
+                    UPDATE tokens_linkedin SET needs_reauth=TRUE, updated_at=now()
+                    WHERE user_id = ANY(%s)
+                """, (user_ids,))
+            # also catches posts scheduled after the user was flagged
+            cur.execute("""
+                UPDATE scheduled_posts sp
+                SET status='needs_reauth', last_error=%s, updated_at=now()
+                FROM tokens_linkedin t
+                WHERE t.needs_reauth AND sp.user_id = t.user_id
+                  AND sp.status='queued' AND sp.scheduled_at >= t.expires_at
+            """, (REAUTH_ERROR,))
+            moved = cur.rowcount
+            cur.execute("SELECT count(*) FROM tokens_linkedin WHERE needs_reauth")
+            M_REAUTH_TOKENS.set(cur.fetchone()[0])
+            return moved
+    finally:
+        put_conn(conn)
+
+
+async def sweep_once() -> dict:
+    """One pass: refresh what can be refreshed, flag the rest, sweep their queued posts."""
+    expiring = await asyncio.to_thread(_expiring_tokens)
+    refreshable = [t for t in expiring if _refreshable(t)]
+    flag = [t.user_id for t in expiring if not _refreshable(t)]
+
+    sem = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+    async def one(t: Expiring):
+        async with sem:
+            return await asyncio.to_thread(_refresh_one, t)
+
+    results = await asyncio.gather(*(one(t) for t in refreshable))
+    refreshed = [r for _uid, r, _give_up in results if r]
+    flag += [uid for uid, _r, give_up in results if give_up]
+
+    await asyncio.to_thread(_save_refreshed, refreshed)
+    moved = await asyncio.to_thread(_flag_and_sweep_posts, flag)
+    M_REAUTH_POSTS.inc(moved)
+    if expiring or moved:
+        log.info("🔑 Token sweep: %d expiring, %d refreshed, %d need reauth, %d posts moved",
+                 len(expiring), len(refreshed), len(flag), moved)
+    return {"expiring": len(expiring), "refreshed": len(refreshed), "needs_reauth": len(flag), "posts": moved}
+
+
+async def run_token_sweeper():
+    log.info("🔑 Token sweeper started (every %ss, lookahead %ss)", SWEEP_SEC, REFRESH_AHEAD_SEC)
+    while True:
+        try:
+            await sweep_once()
+        except Exception as e:
+            log.exception("Token sweep error: %s", e)
+        await asyncio.sleep(SWEEP_SEC)
@@ -3,14 +3,29 @@ import logging, asyncio
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .config import FRONTEND_ORIGIN, LOG_LEVEL
 from .db import init_pool
+from .auth_utils import ensure_oauth_state_schema
+from .metrics import render_all
 from .routes.auth import router as auth_router
 from .routes.profile import router as profile_router
 from .routes.content import router as content_router
 from .routes.oauth_linkedin import router as linkedin_oauth_router
-from app.jobs.scheduler import run_scheduled_poster
+from app.jobs.scheduler import run_scheduled_poster, ensure_schema as ensure_scheduler_schema
+from app.services.linkedin_publish import ensure_schema as ensure_publish_schema
+from app.services.linkedin_media import ensure_schema as ensure_media_schema
+from app.jobs.token_sweeper import run_token_sweeper, ensure_schema as ensure_token_schema
+from app.jobs.profile_sync import run_profile_sync
+from app.jobs.resume_analyzer import run_resume_analyzer
+from app.jobs.resume_compactor import run_resume_compactor
+from app.services.linkedin_profile import ensure_schema as ensure_profile_schema
+from app.services.resume_store import ensure_schema as ensure_resume_schema
+from app.services.analysis_cache import ensure_schema as ensure_analysis_cache_schema
+from app.ai.profile_analyzer import PROMPT_VERSION
+from app.services.linkedin_client import close_session as close_linkedin_session
+from app.services.pdf_extract import shutdown_pool as shutdown_pdf_pool
 
 load_dotenv()
 
@@ -35,21 +50,37 @@ async def startup():
     try:
         init_pool()
         log.info("DB pool initialized")
+        ensure_publish_schema()
+        ensure_media_schema()
+        ensure_scheduler_schema()
+        ensure_token_schema()
+        ensure_oauth_state_schema()
+        ensure_profile_schema()
+        ensure_resume_schema()
+        ensure_analysis_cache_schema(PROMPT_VERSION)
     except Exception as e:
-        log.error("DB pool init failed: %s", e)
+        log.error("DB init failed: %s", e)
 
     # start background scheduler
     app.state.scheduler_task = asyncio.create_task(run_scheduled_poster())
+    app.state.token_sweeper_task = asyncio.create_task(run_token_sweeper())
+    app.state.profile_sync_task = asyncio.create_task(run_profile_sync())
+    app.state.resume_analyzer_task = asyncio.create_task(run_resume_analyzer())
+    app.state.resume_compactor_task = asyncio.create_task(run_resume_compactor())
 
 @app.on_event("shutdown")
 async def shutdown():
-    task = getattr(app.state, "scheduler_task", None)
-    if task:
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+    for name in ("scheduler_task", "token_sweeper_task", "profile_sync_task",
+                 "resume_analyzer_task", "resume_compactor_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    close_linkedin_session()
+    shutdown_pdf_pool()
 
 # Routers
 app.include_router(auth_router)
@@ -60,3 +91,7 @@ app.include_router(linkedin_oauth_router)
 @app.get("/health")
 def health():
     return {"ok": True}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_all(), media_type="text/plain; version=0.0.4")
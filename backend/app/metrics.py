@@ -0,0 +1,120 @@
+# app/metrics.py
+"""
+Tiny in-process metrics registry rendered in the Prometheus text format.
+Good enough for a single app process; no external client library needed.
+"""
+import threading
+import time
+from collections import deque
+
+_lock = threading.Lock()
+_registry: list["_Metric"] = []
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple[str, ...], float] = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, val in sorted(self._values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labels, key)} {val}")
+        return out
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with _lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            s = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, s in sorted(self._series.items()):
+            for i, b in enumerate(self.buckets):
+                le = 'le="%s"' % b
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {s[i]}")
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {s[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {s[-2]}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {s[-1]}")
+        return out
+
+
+class RateWindow(_Metric):
+    """Gauge of events per second over a sliding window, computed at render time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, window_sec: float = 60):
+        super().__init__(name, help)
+        self.window_sec = window_sec
+        self._events: deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_sec
+        while self._events and self._events[0] < cutoff:
+            self._events.popleft()
+
+    def mark(self) -> None:
+        # prune here too: nothing may scrape /metrics, and the deque must stay window-sized
+        now = time.monotonic()
+        with _lock:
+            self._prune(now)
+            self._events.append(now)
+
+    def render(self) -> list[str]:
+        self._prune(time.monotonic())
+        self._values = {(): round(len(self._events) / self.window_sec, 3)}
+        return super().render()
+
+
+def render_all() -> str:
+    with _lock:
+        lines = [line for m in _registry for line in m.render()]
+    return "\n".join(lines) + "\n"
@@ -3,6 +3,7 @@ from app.schemas import SignupIn, LoginIn, AuthOut  # use AuthOut
 from app.auth_utils import hash_password, verify_password, create_access_token
 from app.db import get_conn, put_conn
 from app.deps import get_current_user
+from app.http_cache import Conditional, version_etag
 import time, logging
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -59,9 +60,14 @@ def login(payload: LoginIn):
         put_conn(conn)
 
 @router.get("/me")
-def me(user = Depends(get_current_user)):
+def me(user = Depends(get_current_user), cond: Conditional = Depends()):
     print("[/auth/me] ✅ user =", user)
     uid = user["id"]
+    # get_current_user already read users.updated_at: a current client costs no extra query
+    etag = version_etag("me", uid, user.get("updated_at"))
+    not_modified = cond.check(etag, user.get("updated_at"), route="auth_me")
+    if not_modified:
+        return not_modified
     conn = get_conn()
     try:
         with conn.cursor() as cur:
@@ -75,7 +81,7 @@ def me(user = Depends(get_current_user)):
             row = cur.fetchone()
             if not row:
                 raise HTTPException(status_code=404, detail="User not found")
-            return {
+            return cond.respond({
                 "id": row[0],
                 "name": row[1],
                 "email": row[2],
@@ -84,6 +90,6 @@ def me(user = Depends(get_current_user)):
                 "linkedin_id": row[5],
                 "is_active": row[6],
                 "onboarded": bool(row[7]),
-            }
+            }, etag, user.get("updated_at"))
     finally:
         put_conn(conn)
@@ -2,17 +2,25 @@
 from typing import Literal, Optional, List, Tuple
 from datetime import datetime, timezone, timedelta
 from collections import Counter
-import os, re, requests
+import os, re, time, logging, requests
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from google.api_core.exceptions import ResourceExhausted
 
 from app.deps import get_current_user
 from app.db import get_conn, put_conn
 from app.ai.gemini_service import generate_post
+from app.jobs import scheduler
+from app.services import linkedin_client, linkedin_media, publish_admission, resume_store
+from app.services.linkedin_client import LinkedInError
+from app.services.linkedin_publish import (
+    PublishInProgress, PublishOutcomeUnknown, linkedin_http_error, post_key, publish_http_error, publish_once,
+)
 
 router = APIRouter(prefix="/content", tags=["content"])
+log = logging.getLogger("content")
 
 # --- Timezone (India Standard Time) ---
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -29,12 +37,16 @@ class GenIn(BaseModel):
     kind: Optional[str] = None
     scheduled_at: Optional[datetime] = None
     publish_now: Optional[bool] = False
+    publish_mode: Literal["async", "sync"] = "async"
     visibility: Optional[str] = "PUBLIC"  # or "CONNECTIONS"
 
 class GenOut(BaseModel):
     post_id: int
     text: str
     format: str
+    publish_status: Optional[str] = None   # posted | queued (when publish_now)
+    linkedin_urn: Optional[str] = None
+    status_url: Optional[str] = None
 
 class ScheduleIn(BaseModel):
     post_id: int
@@ -44,24 +56,11 @@ class ScheduleIn(BaseModel):
 class PublishNowIn(BaseModel):
     post_id: int
     visibility: Optional[str] = "PUBLIC"  # or CONNECTIONS
+    # async: publish inline only if the publish queue is idle, else enqueue and return 202
+    mode: Literal["async", "sync"] = "async"
 
 # ------------------ Helpers ------------------
 
-def _latest_resume_text(uid: int) -> str:
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-              SELECT extracted FROM resume_texts
-              WHERE user_id=%s
-              ORDER BY uploaded_at DESC
-              LIMIT 1
-            """, (uid,))
-            row = cur.fetchone()
-            return row[0] if row else ""
-    finally:
-        put_conn(conn)
-
 _STOP = set(("a an and are as at be by for from has have i in is it its of on or that the to with your you we our their they them this those these").split())
 def _simple_keywords(text: str, k: int = 10) -> List[str]:
     if not text:
@@ -103,62 +102,22 @@ def _get_gemini_key(user_id: int) -> Optional[str]:
         put_conn(conn)
     return user_key or os.getenv("GEMINI_API_KEY")
 
-def _linkedin_post_text(access_token: str, li_id: str, text: str, visibility: str = "PUBLIC") -> str:
-    url = "https://api.linkedin.com/v2/ugcPosts"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "X-Restli-Protocol-Version": "2.0.0",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "author": f"urn:li:person:{li_id}",
-        "lifecycleState": "PUBLISHED",
-        "specificContent": {
-            "com.linkedin.ugc.ShareContent": {
-                "shareCommentary": {"text": text[:2900]},
-                "shareMediaCategory": "NONE",
-            }
-        },
-        "visibility": {
-            "com.linkedin.ugc.MemberNetworkVisibility": visibility or "PUBLIC"
-        },
-    }
-    r = requests.post(url, headers=headers, json=body, timeout=25)
-
-    # Debug logs to see why LinkedIn may reject
-    print("[LI] POST ugcPosts status=", r.status_code)
+def _linkedin_post_text(uid: int, post_id: int, access_token: str, li_id: str, text: str,
+                        visibility: str = "PUBLIC", media: Optional[List[str]] = None) -> str:
+    """Publish a saved post at most once; repeat calls for the same post return its stored URN."""
     try:
-        print("[LI] Response JSON:", r.json())
-    except Exception:
-        print("[LI] Response text:", r.text[:500])
-    print("[LI] Request headers sent:", {"Authorization": "redacted", "X-Restli-Protocol-Version": headers["X-Restli-Protocol-Version"], "Content-Type": headers["Content-Type"]})
-    print("[LI] Request body sent:", body)
-
-    if r.status_code in (200, 201):
-        return r.headers.get("x-restli-id") or r.headers.get("location", "") or ""
-
-    # Bubble clear errors
-    try:
-        msg = r.json().get("message") or r.text
-    except Exception:
-        msg = r.text
-    if r.status_code == 403:
-        raise HTTPException(
-            status_code=502,
-            detail=("LinkedIn 403 Forbidden: app lacks Share on LinkedIn product OR this token "
-                    "didn’t grant w_member_social. Reconnect LinkedIn and ensure product access. "
-                    f"Raw: {msg[:300]}")
-        )
-    if r.status_code == 401:
-        raise HTTPException(502, "LinkedIn 401 Unauthorized: token expired/invalid. Reconnect.")
-    if r.status_code == 400:
-        raise HTTPException(502, f"LinkedIn 400 Bad Request: payload/author issue. Raw: {msg[:300]}")
-    raise HTTPException(502, f"LinkedIn error {r.status_code}: {msg[:300]}")
+        urn = publish_once(post_key(post_id), uid, access_token, li_id, text[:2900], visibility or "PUBLIC",
+                           media or None)
+    except (LinkedInError, PublishInProgress, PublishOutcomeUnknown, requests.RequestException) as e:
+        log.warning("Publish of post id=%s failed: %r", post_id, e)
+        raise publish_http_error(e)
+    log.debug("Published post id=%s urn=%s", post_id, urn)
+    return urn
 
 # ------------------ Routes ------------------
 
 @router.post("/generate", response_model=GenOut)
-def generate(payload: GenIn, user = Depends(get_current_user)):
+def generate(payload: GenIn, response: Response, user = Depends(get_current_user)):
     uid = user["id"]
 
     api_key = _get_gemini_key(uid)
@@ -178,7 +137,7 @@ def generate(payload: GenIn, user = Depends(get_current_user)):
     industries = ctx.get("industries", []) or []
     keywords = ctx.get("keywords", []) or []
     if not keywords:
-        pile = " ".join(filter(None, [ctx.get("bio") or "", ctx.get("headline") or "", _latest_resume_text(uid)]))
+        pile = " ".join(filter(None, [ctx.get("bio") or "", ctx.get("headline") or "", resume_store.current_text(uid)]))
         keywords = _simple_keywords(pile, 10)
 
     industries_str = ", ".join(industries)
@@ -239,32 +198,16 @@ Return only the post text, no preface or metadata.
         put_conn(conn)
 
     # Publish immediately (optional)
+    out = GenOut(post_id=post_id, text=text, format=payload.format)
     if payload.publish_now:
-        access_token, li_id = _get_li_token_and_id(uid)
-        li_urn = _linkedin_post_text(access_token, li_id, text, payload.visibility or "PUBLIC")
-
-        # Mark as posted
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    try:
-                        cur.execute(
-                            "ALTER TABLE posts ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ, "
-                            "ADD COLUMN IF NOT EXISTS linkedin_urn TEXT, "
-                            "ADD COLUMN IF NOT EXISTS status VARCHAR(20)"
-                        )
-                    except Exception:
-                        pass
-                    cur.execute(
-                        "UPDATE posts SET published_at=now(), linkedin_urn=%s, status='posted' "
-                        "WHERE id=%s AND user_id=%s",
-                        (li_urn, post_id, uid)
-                    )
-        finally:
-            put_conn(conn)
-
-    return GenOut(post_id=post_id, text=text, format=payload.format)
+        res = _publish_post(uid, post_id, text, payload.visibility or "PUBLIC", payload.publish_mode)
+        out.publish_status = res["status"]
+        out.linkedin_urn = res.get("linkedin_urn")
+        out.status_url = res.get("status_url")
+        if res["status"] == "queued":
+            response.status_code = 202
+
+    return out
 
 @router.post("/schedule")
 def schedule(payload: ScheduleIn, user = Depends(get_current_user)):
@@ -288,9 +231,9 @@ def schedule(payload: ScheduleIn, user = Depends(get_current_user)):
         with conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                  INSERT INTO scheduled_posts (user_id, text, scheduled_at, status, provider)
-                  VALUES (%s,%s,%s,'queued',%s)
-                """, (uid, draft_text, payload.scheduled_at, payload.provider or 'linkedin'))
+                  INSERT INTO scheduled_posts (user_id, text, scheduled_at, status, provider, post_id)
+                  VALUES (%s,%s,%s,'queued',%s,%s)
+                """, (uid, draft_text, payload.scheduled_at, payload.provider or 'linkedin', payload.post_id))
     finally:
         put_conn(conn)
 
@@ -330,6 +273,81 @@ def _get_li_token_and_id(uid: int) -> Tuple[str, str]:
     return access_token, li_id
 
 
+def _mark_post_published(uid: int, post_id: int, li_urn: str) -> None:
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE posts SET published_at=now(), linkedin_urn=%s, status='posted' "
+                    "WHERE id=%s AND user_id=%s",
+                    (li_urn, post_id, uid)
+                )
+    finally:
+        put_conn(conn)
+
+
+def _publish_queue_idle() -> bool:
+    """Fast-path check: nothing due is waiting and LinkedIn isn't being short-circuited."""
+    if linkedin_client.is_open("ugcPosts"):
+        return False
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+              SELECT NOT EXISTS (
+                SELECT 1 FROM scheduled_posts WHERE status='queued' AND scheduled_at <= now()
+              )
+            """)
+            return cur.fetchone()[0]
+    finally:
+        put_conn(conn)
+
+
+def _enqueue_publish(uid: int, post_id: int, text: str, visibility: str) -> None:
+    """Queue an immediate publish ahead of regular scheduled posts (one live job per post)."""
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                  INSERT INTO scheduled_posts (user_id, text, scheduled_at, status, provider, post_id, visibility, priority)
+                  SELECT %s, %s, now(), 'queued', 'linkedin', %s, %s, %s
+                  WHERE NOT EXISTS (
+                    SELECT 1 FROM scheduled_posts WHERE post_id=%s AND status IN ('queued', 'posting')
+                  )
+                """, (uid, text[:2900], post_id, visibility, scheduler.PRIORITY_IMMEDIATE, post_id))
+                cur.execute("UPDATE posts SET status='queued' WHERE id=%s AND user_id=%s", (post_id, uid))
+    finally:
+        put_conn(conn)
+    scheduler.wake()
+
+
+def _publish_post(uid: int, post_id: int, text: str, visibility: str, mode: str,
+                  media: Optional[List[str]] = None) -> dict:
+    """Publish inline (sync mode, or async mode with an idle queue), otherwise hand it to the scheduler."""
+    queued = {"status": "queued", "status_url": f"/content/publish-status/{post_id}"}
+    if mode == "async" and not _publish_queue_idle():
+        _enqueue_publish(uid, post_id, text, visibility)  # the scheduler reads media from posts
+        return queued
+
+    # same member/app buckets the scheduler uses
+    admitted, wait = publish_admission.reserve(uid)
+    if not admitted:
+        if mode == "async":
+            _enqueue_publish(uid, post_id, text, visibility)
+            return queued
+        raise HTTPException(429, "Publishing too fast for LinkedIn. Please retry shortly.",
+                            headers={"Retry-After": str(max(1, int(wait + 0.5)))})
+    if wait > 0:
+        time.sleep(wait)
+
+    access_token, li_id = _get_li_token_and_id(uid)
+    li_urn = _linkedin_post_text(uid, post_id, access_token, li_id, text, visibility, media)
+    _mark_post_published(uid, post_id, li_urn)
+    return {"status": "posted", "linkedin_urn": li_urn or None}
+
+
 @router.post("/publish-now")
 def publish_now(payload: PublishNowIn, user=Depends(get_current_user)):
     uid = user["id"]
@@ -338,37 +356,120 @@ def publish_now(payload: PublishNowIn, user=Depends(get_current_user)):
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT draft_text FROM posts WHERE id=%s AND user_id=%s", (payload.post_id, uid))
+            cur.execute(
+                "SELECT draft_text, status, linkedin_urn, media_assets FROM posts WHERE id=%s AND user_id=%s",
+                (payload.post_id, uid)
+            )
+            row = cur.fetchone()
+            if not row:
+                raise HTTPException(404, "Post not found")
+            draft_text, post_status, stored_urn, media = row
+    finally:
+        put_conn(conn)
+
+    if post_status == "posted":
+        return {"message": "Already published to LinkedIn", "linkedin_urn": stored_urn or None}
+
+    # 2) Inline publish, or 202 + status URL when the publish queue is busy
+    res = _publish_post(uid, payload.post_id, draft_text, payload.visibility or "PUBLIC", payload.mode, media)
+    if res["status"] == "queued":
+        return JSONResponse(status_code=202, content={
+            "message": "Queued for publishing",
+            "post_id": payload.post_id,
+            "status_url": res["status_url"],
+        })
+    return {"message": "Published to LinkedIn", "linkedin_urn": res["linkedin_urn"]}
+
+
+@router.get("/publish-status/{post_id}")
+def publish_status(post_id: int, user=Depends(get_current_user)):
+    """Poll target for queued publishes: draft | queued | posting | posted | failed | needs_reauth."""
+    uid = user["id"]
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+              SELECT p.status, p.linkedin_urn, p.published_at, sp.status, sp.last_error
+              FROM posts p
+              LEFT JOIN LATERAL (
+                SELECT status, last_error FROM scheduled_posts
+                WHERE post_id = p.id ORDER BY id DESC LIMIT 1
+              ) sp ON TRUE
+              WHERE p.id=%s AND p.user_id=%s
+            """, (post_id, uid))
             row = cur.fetchone()
             if not row:
                 raise HTTPException(404, "Post not found")
-            draft_text = row[0]
     finally:
         put_conn(conn)
 
-    # 2) LinkedIn token + post
+    post_status, urn, published_at, job_status, job_error = row
+    status = post_status if post_status == "posted" else (job_status or post_status or "draft")
+    return {
+        "post_id": post_id,
+        "status": status,
+        "linkedin_urn": urn,
+        "published_at": published_at.isoformat() if published_at else None,
+        "error": job_error if status in ("failed", "needs_reauth", "queued") else None,
+    }
+
+
+# ---------- Post media (images) ----------
+
+@router.post("/posts/{post_id}/media")
+def attach_media(post_id: int, file: UploadFile = File(...), user=Depends(get_current_user)):
+    """Upload an image to LinkedIn (or reuse an identical earlier upload) and attach it to a draft."""
+    uid = user["id"]
+    if (file.content_type or "").lower() not in linkedin_media.ALLOWED_TYPES:
+        raise HTTPException(415, "Only JPEG, PNG or GIF images supported")
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, media_assets FROM posts WHERE id=%s AND user_id=%s", (post_id, uid))
+            row = cur.fetchone()
+    finally:
+        put_conn(conn)
+    if not row:
+        raise HTTPException(404, "Post not found")
+    post_status, media = row
+    if post_status in ("queued", "posted"):
+        raise HTTPException(409, f"Post is already {post_status}; media can't be changed")
+    if len(media or []) >= linkedin_media.MAX_IMAGES_PER_POST:
+        raise HTTPException(409, f"A post can carry at most {linkedin_media.MAX_IMAGES_PER_POST} images")
+
     access_token, li_id = _get_li_token_and_id(uid)
-    li_urn = _linkedin_post_text(access_token, li_id, draft_text, payload.visibility or "PUBLIC")
+    try:
+        spooled, sha256, size = linkedin_media.spool(file.file)
+    except linkedin_media.MediaTooLarge as e:
+        raise HTTPException(413, str(e))
+    try:
+        if not size:
+            raise HTTPException(400, "Empty file")
+        asset, cached = linkedin_media.upload_image(access_token, li_id, spooled, sha256, size)
+    except LinkedInError as e:
+        log.warning("Image upload for post id=%s failed: %r", post_id, e)
+        raise linkedin_http_error(e)
+    except requests.RequestException as e:
+        raise HTTPException(504, f"LinkedIn did not respond: {e}")
+    finally:
+        spooled.close()
 
-    # 3) Mark as published in your DB (add cols if missing)
     conn = get_conn()
     try:
         with conn:
             with conn.cursor() as cur:
-                try:
-                    cur.execute(
-                        "ALTER TABLE posts ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ, "
-                        "ADD COLUMN IF NOT EXISTS linkedin_urn TEXT, "
-                        "ADD COLUMN IF NOT EXISTS status VARCHAR(20)"
-                    )
-                except Exception:
-                    pass
-                cur.execute(
-                    "UPDATE posts SET published_at=now(), linkedin_urn=%s, status='posted' "
-                    "WHERE id=%s AND user_id=%s",
-                    (li_urn, payload.post_id, uid)
-                )
+                cur.execute("""
+                  UPDATE posts
+                  SET media_assets = CASE WHEN %s = ANY(COALESCE(media_assets, '{}'))
+                                          THEN media_assets
+                                          ELSE array_append(COALESCE(media_assets, '{}'), %s) END
+                  WHERE id=%s AND user_id=%s
+                  RETURNING media_assets
+                """, (asset, asset, post_id, uid))
+                media = cur.fetchone()[0]
     finally:
         put_conn(conn)
 
-    return {"message": "Published to LinkedIn", "linkedin_urn": li_urn or None}
+    return {"post_id": post_id, "asset_urn": asset, "cached": cached, "sha256": sha256,
+            "bytes": size, "media_assets": media}
@@ -1,27 +1,27 @@
 # app/routes/oauth_linkedin.py
 import os
-import time
-import secrets
 import urllib.parse
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from psycopg2.extras import Json
 
-import requests
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import RedirectResponse, JSONResponse
 
 from app.deps import get_current_user
+from app.http_cache import Conditional, version_etag
 from app.db import get_conn, put_conn
-from app.auth_utils import hash_password, create_access_token
+from app.auth_utils import UNUSABLE_PASSWORD, create_access_token, create_oauth_state, consume_oauth_state
+from app.services import linkedin_client, linkedin_profile, summary_cache
+from app.services.linkedin_client import LinkedInError, LinkedInUnavailable
+from app.services.linkedin_publish import linkedin_http_error
 
 router = APIRouter(prefix="/oauth/linkedin", tags=["oauth"])
 IST = timezone(timedelta(hours=5, minutes=30))
 
 # ----- LinkedIn OAuth/OIDC endpoints -----
+# (token exchange and /v2/userinfo go through app.services.linkedin_client)
 AUTH_URL  = "https://www.linkedin.com/oauth/v2/authorization"
-TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
-ME_URL    = "https://api.linkedin.com/v2/userinfo"  # OIDC userinfo
 
 # near the top
 _raw_scopes = os.getenv("OAUTH_SCOPES", "openid profile email w_member_social")
@@ -42,174 +42,162 @@ BRIDGE_FRONTEND = os.getenv("FRONTEND_BRIDGE_URL", "http://localhost:4200/oauth-
 # Fast login: on repeated sign-ins (public flow), skip heavy profile writes (only refresh token)
 FAST_LOGIN_MIN_SAVE = os.getenv("LI_FAST_LOGIN_MIN_SAVE", "true").lower() in ("1", "true", "yes")
 
-# ---------- ephemeral state cache: state -> (user_id_from_state, exp_ts) ----------
-_STATE_CACHE: dict[str, tuple[int, float]] = {}
-
-
-def _put_state(state: str, user_id: int, ttl: int = 600) -> None:
-    print(f"[OAUTH] Caching state={state} for user_id={user_id}")
-    _STATE_CACHE[state] = (user_id, time.time() + ttl)
-
-
-def _pop_state(state: str) -> Optional[int]:
-    tup = _STATE_CACHE.pop(state, None)
-    if not tup:
-        print(f"[OAUTH] State {state} not found")
-        return None
-    uid, exp = tup
-    if exp <= time.time():
-        print(f"[OAUTH] State {state} expired")
-        return None
-    print(f"[OAUTH] Popped state={state} for user_id={uid}")
-    return uid
-
-
 # ----------------------------- DB helpers -----------------------------
-def _get_existing_user_id_by_li_or_email(li_id: Optional[str], email: Optional[str]) -> Optional[int]:
-    """Find an existing user via linkedin_profile.li_id first; fallback to users.email."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            if li_id:
-                cur.execute("SELECT user_id FROM linkedin_profile WHERE li_id=%s", (li_id,))
-                r = cur.fetchone()
-                if r:
-                    return r[0]
-            if email:
-                cur.execute("SELECT id FROM users WHERE email=%s", (email,))
-                r = cur.fetchone()
-                if r:
-                    return r[0]
-        return None
-    finally:
-        put_conn(conn)
-
-
-# at the top of the file (keep your other imports)
-from datetime import datetime, timedelta, timezone
-IST = timezone(timedelta(hours=5, minutes=30))
-
-def _save_token_only(user_id: int, access_token: str, expires_in: int) -> None:
-    expires_at = datetime.now(IST) + timedelta(seconds=expires_in or 3600)
-    print(f"[DB] Upserting tokens_linkedin uid={user_id} expires_at(IST)={expires_at.isoformat()}")
-    conn = get_conn()
-    try:
-        with conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO tokens_linkedin (user_id, access_token, expires_at)
-                VALUES (%s,%s,%s)
-                ON CONFLICT (user_id) DO UPDATE
-                SET access_token=EXCLUDED.access_token,
-                    expires_at=EXCLUDED.expires_at,
-                    updated_at=now()
-                """,
-                (user_id, access_token, expires_at),
-            )
-    finally:
-        put_conn(conn)
-
+# Public sign-in: find the user by li_id (then email), create them if new, and upsert
+# token + profile, all in one statement. Existing users on the fast path only get their
+# token refreshed (plus a profile row if they never had one).
+_PUBLIC_LOGIN_SQL = """
+WITH existing AS (
+    SELECT id FROM (
+        SELECT user_id AS id, 0 AS pref FROM linkedin_profile WHERE li_id = %(li_id)s
+        UNION ALL
+        SELECT id, 1 FROM users WHERE %(email)s IS NOT NULL AND email = %(email)s
+    ) m
+    ORDER BY pref
+    LIMIT 1
+),
+created AS (
+    INSERT INTO users (name, email, country_code, mobile, linkedin_id, password_hash, is_active)
+    SELECT %(name)s, %(email)s, '+1', '', %(li_id)s, %(password_hash)s, TRUE
+    WHERE NOT EXISTS (SELECT 1 FROM existing)
+    ON CONFLICT (email) DO UPDATE SET linkedin_id = EXCLUDED.linkedin_id, updated_at = now()
+    RETURNING id
+),
+u AS (
+    SELECT id, FALSE AS created FROM existing
+    UNION ALL
+    SELECT id, TRUE FROM created
+),
+tok AS (
+    INSERT INTO tokens_linkedin (user_id, access_token, expires_at, refresh_token, refresh_expires_at)
+    SELECT id, %(access_token)s, %(expires_at)s, %(refresh_token)s, %(refresh_expires_at)s FROM u
+    ON CONFLICT (user_id) DO UPDATE
+    SET access_token = EXCLUDED.access_token,
+        expires_at = EXCLUDED.expires_at,
+        refresh_token = COALESCE(EXCLUDED.refresh_token, tokens_linkedin.refresh_token),
+        refresh_expires_at = COALESCE(EXCLUDED.refresh_expires_at, tokens_linkedin.refresh_expires_at),
+        needs_reauth = FALSE,
+        updated_at = now()
+),
+-- posts parked by the token sweeper can go out again with the new token
+requeued AS (
+    UPDATE scheduled_posts sp
+    SET status = 'queued', last_error = NULL, updated_at = now()
+    FROM u
+    WHERE sp.user_id = u.id AND sp.status = 'needs_reauth' AND sp.scheduled_at > now()
+),
+prof AS (
+    INSERT INTO linkedin_profile (user_id, li_id, first_name, last_name, picture_url, email, raw_json, raw_hash)
+    SELECT id, %(li_id)s, %(first_name)s, %(last_name)s, %(picture)s, %(email)s, %(raw)s, %(raw_hash)s FROM u
+    WHERE u.created OR NOT %(fast)s
+       OR NOT EXISTS (SELECT 1 FROM linkedin_profile lp WHERE lp.user_id = u.id)
+    ON CONFLICT (user_id) DO UPDATE
+    SET li_id = EXCLUDED.li_id,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        picture_url = EXCLUDED.picture_url,
+        email = EXCLUDED.email,
+        raw_json = EXCLUDED.raw_json,
+        raw_hash = EXCLUDED.raw_hash,
+        fetched_at = now()
+)
+SELECT id, created FROM u
+"""
+
+# Logged-in flow: link LinkedIn to the current user unless that LinkedIn account
+# already belongs to someone else (then nothing is written and no row comes back).
+_LINK_SQL = """
+WITH u AS (
+    UPDATE users SET linkedin_id = %(li_id)s, updated_at = now()
+    WHERE id = %(uid)s
+      AND NOT EXISTS (SELECT 1 FROM linkedin_profile WHERE li_id = %(li_id)s AND user_id <> %(uid)s)
+    RETURNING id
+),
+tok AS (
+    INSERT INTO tokens_linkedin (user_id, access_token, expires_at, refresh_token, refresh_expires_at)
+    SELECT id, %(access_token)s, %(expires_at)s, %(refresh_token)s, %(refresh_expires_at)s FROM u
+    ON CONFLICT (user_id) DO UPDATE
+    SET access_token = EXCLUDED.access_token,
+        expires_at = EXCLUDED.expires_at,
+        refresh_token = COALESCE(EXCLUDED.refresh_token, tokens_linkedin.refresh_token),
+        refresh_expires_at = COALESCE(EXCLUDED.refresh_expires_at, tokens_linkedin.refresh_expires_at),
+        needs_reauth = FALSE,
+        updated_at = now()
+),
+-- posts parked by the token sweeper can go out again with the new token
+requeued AS (
+    UPDATE scheduled_posts sp
+    SET status = 'queued', last_error = NULL, updated_at = now()
+    FROM u
+    WHERE sp.user_id = u.id AND sp.status = 'needs_reauth' AND sp.scheduled_at > now()
+),
+prof AS (
+    INSERT INTO linkedin_profile (user_id, li_id, first_name, last_name, picture_url, email, raw_json, raw_hash)
+    SELECT id, %(li_id)s, %(first_name)s, %(last_name)s, %(picture)s, %(email)s, %(raw)s, %(raw_hash)s FROM u
+    ON CONFLICT (user_id) DO UPDATE
+    SET li_id = EXCLUDED.li_id,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        picture_url = EXCLUDED.picture_url,
+        email = EXCLUDED.email,
+        raw_json = EXCLUDED.raw_json,
+        raw_hash = EXCLUDED.raw_hash,
+        fetched_at = now()
+)
+SELECT id FROM u
+"""
 
 
-def _create_user_with_li(ui: dict, access_token: str, expires_in: int) -> int:
-    """Create user once, save initial linkedin_profile, and persist token."""
-    li_id = ui.get("sub")
+def _login_params(ui: dict, tok: dict) -> dict:
+    refresh_in = tok.get("refresh_token_expires_in")
     fname = ui.get("given_name") or ""
     lname = ui.get("family_name") or ""
     email = ui.get("email")
-    pic = ui.get("picture")
-    name = (f"{fname} {lname}").strip() or (email.split("@")[0] if email else "LinkedIn User")
+    return {
+        "li_id": ui.get("sub"),
+        "first_name": fname,
+        "last_name": lname,
+        "email": email,
+        "picture": ui.get("picture"),
+        "raw": Json(ui),
+        "raw_hash": linkedin_profile.profile_hash(ui),
+        "name": (f"{fname} {lname}").strip() or (email.split("@")[0] if email else "LinkedIn User"),
+        # LinkedIn-only accounts have no password; the marker never verifies
+        "password_hash": UNUSABLE_PASSWORD,
+        "access_token": tok["access_token"],
+        "expires_at": datetime.now(IST) + timedelta(seconds=tok.get("expires_in") or 3600),
+        # only apps LinkedIn approved for programmatic refresh get these
+        "refresh_token": tok.get("refresh_token"),
+        "refresh_expires_at": datetime.now(IST) + timedelta(seconds=refresh_in) if refresh_in else None,
+        "fast": FAST_LOGIN_MIN_SAVE,
+    }
 
-    rnd = secrets.token_urlsafe(12)
-    pwd_hash = hash_password(rnd)
 
-    print(f"[DB] Creating new user name={name}, email={email}")
+def _upsert_public_login(ui: dict, tok: dict) -> tuple[int, bool]:
+    """(user_id, created) for a public LinkedIn sign-in; one round trip, one transaction."""
     conn = get_conn()
     try:
-        with conn:
-            with conn.cursor() as cur:
-                # users (unique by email)
-                cur.execute(
-                    """
-                    INSERT INTO users (name, email, country_code, mobile, linkedin_id, password_hash, is_active)
-                    VALUES (%s,%s,%s,%s,%s,%s,TRUE)
-                    ON CONFLICT (email) DO UPDATE SET linkedin_id=EXCLUDED.linkedin_id
-                    RETURNING id
-                    """,
-                    (name, email, "+1", "", li_id, pwd_hash),
-                )
-                user_id = cur.fetchone()[0]
-
-                # linkedin_profile
-                print(f"[DB] Upserting linkedin_profile for user_id={user_id}")
-                cur.execute(
-                    """
-                    INSERT INTO linkedin_profile (user_id, li_id, first_name, last_name, picture_url, email, raw_json)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s)
-                    ON CONFLICT (user_id) DO UPDATE
-                    SET li_id=EXCLUDED.li_id,
-                        first_name=EXCLUDED.first_name,
-                        last_name=EXCLUDED.last_name,
-                        picture_url=EXCLUDED.picture_url,
-                        email=EXCLUDED.email,
-                        raw_json=EXCLUDED.raw_json,
-                        fetched_at=now()
-                    """,
-                    (user_id, li_id, fname, lname, pic, email, Json(ui)),
-                )
+        with conn, conn.cursor() as cur:
+            cur.execute(_PUBLIC_LOGIN_SQL, _login_params(ui, tok))
+            user_id, created = cur.fetchone()
     finally:
         put_conn(conn)
+    return user_id, created
 
-    _save_token_only(user_id, access_token, expires_in)
-    return user_id
 
-
-def _link_li_to_logged_in_user(current_user_id: int, ui: dict, access_token: str, expires_in: int) -> int:
+def _link_li_to_logged_in_user(current_user_id: int, ui: dict, tok: dict) -> int:
     """Link LinkedIn account to an already-logged-in app user (start-url flow)."""
-    li_id = ui.get("sub")
-    fname = ui.get("given_name") or ""
-    lname = ui.get("family_name") or ""
-    email = ui.get("email")
-    pic = ui.get("picture")
-
-    # Prevent linking the same LinkedIn account to a different existing user
-    existing_uid = _get_existing_user_id_by_li_or_email(li_id, None)
-    if existing_uid and existing_uid != current_user_id:
-        raise HTTPException(status_code=409, detail="This LinkedIn account is already linked to another user.")
-
-    print(f"[DB] Linking LinkedIn -> user_id={current_user_id}")
+    params = _login_params(ui, tok)
+    params["uid"] = current_user_id
     conn = get_conn()
     try:
-        with conn:
-            with conn.cursor() as cur:
-                # ensure users.email reflects latest (optional)
-                if email:
-                    cur.execute(
-                        "UPDATE users SET linkedin_id=%s, updated_at=now() WHERE id=%s",
-                        (li_id, current_user_id),
-                    )
-
-                # upsert linkedin_profile for this user
-                cur.execute(
-                    """
-                    INSERT INTO linkedin_profile (user_id, li_id, first_name, last_name, picture_url, email, raw_json)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s)
-                    ON CONFLICT (user_id) DO UPDATE
-                    SET li_id=EXCLUDED.li_id,
-                        first_name=EXCLUDED.first_name,
-                        last_name=EXCLUDED.last_name,
-                        picture_url=EXCLUDED.picture_url,
-                        email=EXCLUDED.email,
-                        raw_json=EXCLUDED.raw_json,
-                        fetched_at=now()
-                    """,
-                    (current_user_id, li_id, fname, lname, pic, email, Json(ui)),
-                )
-
+        with conn, conn.cursor() as cur:
+            cur.execute(_LINK_SQL, params)
+            row = cur.fetchone()
     finally:
         put_conn(conn)
-
-    _save_token_only(current_user_id, access_token, expires_in)
+    if not row:
+        raise HTTPException(status_code=409, detail="This LinkedIn account is already linked to another user.")
     return current_user_id
 
 
@@ -219,8 +207,7 @@ def start_linkedin_oauth_url(user=Depends(get_current_user)):
     """Logged-in flow: link LinkedIn to the current app user."""
     if not CLIENT_ID or not CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="LinkedIn app not configured on server")
-    state = secrets.token_urlsafe(24)
-    _put_state(state, user["id"])  # logged-in flow
+    state = create_oauth_state(user["id"])  # logged-in flow
     params = {
         "response_type": "code",
         "client_id": CLIENT_ID,
@@ -238,8 +225,7 @@ def start_public_flow():
     """Public flow: sign in / sign up via LinkedIn (no app JWT yet)."""
     if not CLIENT_ID or not CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="LinkedIn app not configured on server")
-    state = secrets.token_urlsafe(24)
-    _put_state(state, 0)  # 0 => no current app user (public)
+    state = create_oauth_state(0)  # 0 => no current app user (public)
     params = {
         "response_type": "code",
         "client_id": CLIENT_ID,
@@ -255,51 +241,44 @@ def start_public_flow():
 @router.get("/callback")
 def linkedin_callback(code: Optional[str] = None, state: Optional[str] = None):
     """Handle both public and logged-in callbacks with fast-path."""
-    print(f"[ROUTE] callback with code={code}, state={state}")
-    user_id_from_state = _pop_state(state or "")
+    print(f"[ROUTE] callback with code={'yes' if code else 'no'}")
+    user_id_from_state = consume_oauth_state(state or "")
+    print(f"[OAUTH] state -> user_id={user_id_from_state}")
     if not code or state is None or user_id_from_state is None:
         raise HTTPException(status_code=400, detail="Invalid OAuth state")
 
     # 1) Exchange code for token
     print("[OAUTH] Exchanging code for token...")
-    data = {
-        "grant_type": "authorization_code",
-        "code": code,
-        "redirect_uri": REDIRECT_URI,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-    }
-    t = requests.post(TOKEN_URL, data=data, timeout=20)
-    print("[OAUTH] Token exchange status=", t.status_code)
-    if t.status_code != 200:
-        raise HTTPException(status_code=400, detail=f"Token exchange failed: {t.text}")
-    tok = t.json()
+    try:
+        tok = linkedin_client.exchange_code(code, REDIRECT_URI, CLIENT_ID, CLIENT_SECRET)
+    except LinkedInError as e:
+        print("[OAUTH] Token exchange status=", e.status_code)
+        if isinstance(e, LinkedInUnavailable):
+            raise linkedin_http_error(e)
+        raise HTTPException(status_code=400, detail=f"Token exchange failed: {e.message}")
     access_token = tok["access_token"]
-    expires_in = tok.get("expires_in", 3600)
 
     # 2) Fetch OIDC userinfo
     print("[OAUTH] Fetching OIDC /userinfo...")
-    r = requests.get(ME_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=15)
-    if r.status_code != 200:
-        raise HTTPException(status_code=400, detail=f"LinkedIn /userinfo failed: {r.text}")
-    ui = r.json()
+    try:
+        ui = linkedin_client.userinfo(access_token)
+    except LinkedInError as e:
+        if isinstance(e, LinkedInUnavailable):
+            raise linkedin_http_error(e)
+        raise HTTPException(status_code=400, detail=f"LinkedIn /userinfo failed: {e.message}")
     print("[OAUTH] /userinfo JSON:", ui)
 
-    li_id = ui.get("sub")
-    email = ui.get("email")
-
-    # 3) Public vs logged-in flow
+    # 3) Public vs logged-in flow: user, token and profile in one transaction
     if user_id_from_state == 0:
-        # PUBLIC: fast-path login
-        existing_uid = _get_existing_user_id_by_li_or_email(li_id, email)
-    if existing_uid:
-        print(f"[OAUTH] Fast login for existing user_id={existing_uid}")
-        # Always update the token, regardless of FAST_LOGIN_MIN_SAVE
-        _save_token_only(existing_uid, access_token, expires_in)
-        final_user_id = existing_uid
+        final_user_id, created = _upsert_public_login(ui, tok)
+        if created:
+            print(f"[OAUTH] First-time LinkedIn user -> created user_id={final_user_id}")
+        else:
+            print(f"[OAUTH] Fast login for existing user_id={final_user_id}")
     else:
-        print("[OAUTH] First-time LinkedIn user -> creating app user")
-        final_user_id = _create_user_with_li(ui, access_token, expires_in)
+        final_user_id = _link_li_to_logged_in_user(user_id_from_state, ui, tok)
+        print(f"[OAUTH] Linked LinkedIn -> user_id={final_user_id}")
+    summary_cache.invalidate(final_user_id)
 
     # 4) Mint app JWT & redirect to bridge
     jwt = create_access_token(str(final_user_id))
@@ -309,74 +288,79 @@ def linkedin_callback(code: Optional[str] = None, state: Optional[str] = None):
 
 
 @router.post("/sync")
-def sync_linkedin(user=Depends(get_current_user)):
-    """Refresh LinkedIn profile using stored access token (cheap check without OAuth)."""
+def sync_linkedin(force: bool = False, user=Depends(get_current_user)):
+    """
+    Refresh LinkedIn profile using stored access token (cheap check without OAuth).
+    Skips LinkedIn entirely when the profile was fetched in the last few minutes (unless
+    `force`), and only rewrites the row when the payload actually changed.
+    """
     uid = user["id"]
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT access_token, expires_at FROM tokens_linkedin WHERE user_id=%s", (uid,))
+            cur.execute("""
+                SELECT t.access_token, t.expires_at, lp.raw_json, lp.raw_hash,
+                       COALESCE(lp.fetched_at > now() - make_interval(secs => %s), FALSE)
+                FROM tokens_linkedin t
+                LEFT JOIN linkedin_profile lp ON lp.user_id = t.user_id
+                WHERE t.user_id=%s
+            """, (linkedin_profile.FRESH_SEC, uid))
             row = cur.fetchone()
             if not row:
                 raise HTTPException(status_code=409, detail="LinkedIn not connected. Start OAuth.")
-            access_token, expires_at = row
+            access_token, expires_at, stored, stored_hash, fresh = row
     finally:
         put_conn(conn)
 
+    if fresh and stored and not force:
+        linkedin_profile.M_SYNC.inc(result="skipped")
+        return {"message": "LinkedIn profile is up to date", "profile": stored, "changed": False}
+
     if expires_at and expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=401, detail="LinkedIn token expired. Reconnect.")
 
-    # Fetch fresh profile snapshot and upsert
-    r = requests.get(ME_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=15)
-    if r.status_code != 200:
-        raise HTTPException(status_code=401, detail=f"LinkedIn token invalid: {r.text}")
-    ui = r.json()
-
-    li_id = ui.get("sub")
-    fname = ui.get("given_name") or ""
-    lname = ui.get("family_name") or ""
-    email = ui.get("email")
-    pic = ui.get("picture")
-
-    conn = get_conn()
+    # Fetch fresh profile snapshot; written only if it differs from what we have
     try:
-        with conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO linkedin_profile (user_id, li_id, first_name, last_name, picture_url, email, raw_json)
-                VALUES (%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (user_id) DO UPDATE
-                SET li_id=EXCLUDED.li_id,
-                    first_name=EXCLUDED.first_name,
-                    last_name=EXCLUDED.last_name,
-                    picture_url=EXCLUDED.picture_url,
-                    email=EXCLUDED.email,
-                    raw_json=EXCLUDED.raw_json,
-                    fetched_at=now()
-                """,
-                (uid, li_id, fname, lname, pic, email, Json(ui)),
-            )
-    finally:
-        put_conn(conn)
-
-    return {"message": "LinkedIn profile refreshed", "profile": ui}
+        ui = linkedin_client.userinfo(access_token)
+    except LinkedInError as e:
+        if isinstance(e, LinkedInUnavailable):
+            raise linkedin_http_error(e)
+        raise HTTPException(status_code=401, detail=f"LinkedIn token invalid: {e.message}")
+
+    changed = linkedin_profile.save_profiles([(uid, ui, stored_hash)]) > 0
+    return {
+        "message": "LinkedIn profile refreshed" if changed else "LinkedIn profile unchanged",
+        "profile": ui,
+        "changed": changed,
+    }
 
 
 @router.get("/check")
-def check_status(user=Depends(get_current_user)):
+def check_status(user=Depends(get_current_user), cond: Conditional = Depends()):
     """Lightweight status: is LinkedIn connected? returns li_id & token expiry."""
     uid = user["id"]
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT li_id FROM linkedin_profile WHERE user_id=%s", (uid,))
-            li = cur.fetchone()
-            cur.execute("SELECT expires_at FROM tokens_linkedin WHERE user_id=%s", (uid,))
-            tok = cur.fetchone()
-            return {
-                "connected": bool(li and li[0]),
-                "li_id": li[0] if li else None,
-                "expires_at": tok[0].isoformat() if tok and tok[0] else None,
-            }
+            cur.execute("""
+                SELECT lp.li_id, t.expires_at, t.needs_reauth, t.updated_at
+                FROM users u
+                LEFT JOIN linkedin_profile lp ON lp.user_id = u.id
+                LEFT JOIN tokens_linkedin t ON t.user_id = u.id
+                WHERE u.id=%s
+            """, (uid,))
+            li_id, expires_at, needs_reauth, tok_updated_at = cur.fetchone() or (None, None, None, None)
     finally:
         put_conn(conn)
+
+    # every token write (sign-in, refresh, needs_reauth flag) bumps tokens_linkedin.updated_at
+    etag = version_etag("li-check", uid, li_id, tok_updated_at)
+    not_modified = cond.check(etag, route="linkedin_check")
+    if not_modified:
+        return not_modified
+    return cond.respond({
+        "connected": bool(li_id),
+        "li_id": li_id,
+        "expires_at": expires_at.isoformat() if expires_at else None,
+        "needs_reauth": bool(needs_reauth),
+    }, etag)
@@ -1,53 +1,69 @@
 # app/routes/profile.py
+import asyncio
 import logging
-import io
+from datetime import datetime
 from typing import Optional
-import os, re
+import os, re, time
 from collections import Counter
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import JSONResponse
 from app.db import get_conn, put_conn
 from app.schemas import ProfileIn, ProfileOut, ProvidersIn
 from app.deps import get_current_user
-from pdfminer.high_level import extract_text
-from app.ai.profile_analyzer import analyze_profile
+from app.http_cache import Conditional, version_etag
+from app.services import pdf_extract, resume_store, summary_cache
+from app.jobs import resume_analyzer
 # from .oauth_linkedin import _save_token_and_profile  # only needed if you call it here
 
 router = APIRouter(prefix="/profile", tags=["profile"])
 log = logging.getLogger("profile")
 
 
-@router.get("", response_model=ProfileOut)
-def get_profile(user=Depends(get_current_user)):
-    print("[/profile] requester:", user)
-    uid = user["id"]
+_PROFILE_COLUMNS = "user_id, headline, bio, industries, goals, tone, keywords, updated_at"
+
+
+def _profile_body(uid: int, row) -> tuple[dict, Optional[datetime]]:
+    """(profile body, profiles.updated_at) from a _PROFILE_COLUMNS row; an empty shape for None."""
+    if not row:
+        # Return an empty profile shape
+        return {
+            "user_id": uid, "headline": None, "bio": None, "industries": [],
+            "goals": None, "tone": None, "keywords": []
+        }, None
+    return {
+        "user_id": row[0],
+        "headline": row[1],
+        "bio": row[2],
+        "industries": row[3] or [],
+        "goals": row[4],
+        "tone": row[5],
+        "keywords": row[6] or []
+    }, row[7]
+
+
+def _load_profile(uid: int) -> tuple[dict, Optional[datetime]]:
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT user_id, headline, bio, industries, goals, tone, keywords
-                FROM profiles WHERE user_id=%s
-            """, (uid,))
-            row = cur.fetchone()
-            if not row:
-                # Return an empty profile shape
-                return {
-                    "user_id": uid, "headline": None, "bio": None, "industries": [],
-                    "goals": None, "tone": None, "keywords": []
-                }
-            return {
-                "user_id": row[0],
-                "headline": row[1],
-                "bio": row[2],
-                "industries": row[3] or [],
-                "goals": row[4],
-                "tone": row[5],
-                "keywords": row[6] or []
-            }
+            cur.execute(f"SELECT {_PROFILE_COLUMNS} FROM profiles WHERE user_id=%s", (uid,))
+            return _profile_body(uid, cur.fetchone())
     finally:
         put_conn(conn)
 
 
+@router.get("", response_model=ProfileOut)
+def get_profile(user=Depends(get_current_user), cond: Conditional = Depends()):
+    print("[/profile] requester:", user)
+    uid = user["id"]
+    body, updated_at = _load_profile(uid)
+    etag = version_etag("profile", uid, updated_at)
+    not_modified = cond.check(etag, updated_at, route="profile")
+    if not_modified:
+        return not_modified
+    return cond.respond(body, etag, updated_at)
+
+
 @router.put("", response_model=ProfileOut)
 def upsert_profile(payload: ProfileIn, user=Depends(get_current_user)):
     uid = user["id"]
@@ -55,9 +71,13 @@ def upsert_profile(payload: ProfileIn, user=Depends(get_current_user)):
     try:
         with conn:
             with conn.cursor() as cur:
-                cur.execute("""
+                # profile upsert + onboarded flag in one statement; the saved row comes back
+                cur.execute(f"""
+                    WITH onboarded AS (
+                        UPDATE users SET onboarded=TRUE, updated_at=now() WHERE id=%(uid)s
+                    )
                     INSERT INTO profiles (user_id, headline, bio, industries, goals, tone, keywords)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    VALUES (%(uid)s, %(headline)s, %(bio)s, %(industries)s, %(goals)s, %(tone)s, %(keywords)s)
                     ON CONFLICT (user_id) DO UPDATE
                     SET headline=EXCLUDED.headline,
                         bio=EXCLUDED.bio,
@@ -66,12 +86,15 @@ def upsert_profile(payload: ProfileIn, user=Depends(get_current_user)):
                         tone=EXCLUDED.tone,
                         keywords=EXCLUDED.keywords,
                         updated_at=now()
-                """, (uid, payload.headline, payload.bio, payload.industries,
-                      payload.goals, payload.tone, payload.keywords))
-                cur.execute("UPDATE users SET onboarded=TRUE, updated_at=now() WHERE id=%s", (uid,))
-        return get_profile(user)  # reuse getter
+                    RETURNING {_PROFILE_COLUMNS}
+                """, {"uid": uid, "headline": payload.headline, "bio": payload.bio,
+                      "industries": payload.industries, "goals": payload.goals,
+                      "tone": payload.tone, "keywords": payload.keywords})
+                row = cur.fetchone()
     finally:
         put_conn(conn)
+    summary_cache.invalidate(uid)
+    return _profile_body(uid, row)[0]
 
 
 @router.put("/providers")
@@ -100,67 +123,76 @@ def upload_resume(file: UploadFile = File(...), user=Depends(get_current_user)):
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF resumes supported")
 
-    # Read PDF and extract text
-    content = file.file.read()
-    text = extract_text(io.BytesIO(content)) or ""
-
-    # Load LinkedIn snapshot (if any)
-    conn = get_conn()
+    # Stream the upload through SHA-256 into a bounded spool
     try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT raw_json FROM linkedin_profile WHERE user_id=%s", (user["id"],))
-            row = cur.fetchone()
-            linkedin_json = row[0] if row else {}
+        spooled, sha256, size = resume_store.spool(file.file)
+    except pdf_extract.PdfTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        # Same PDF as before: reuse its extraction and insights
+        stored = resume_store.reuse_existing(user["id"], sha256, file.filename)
+        if stored is None:
+            try:
+                text = pdf_extract.extract_text(spooled.read())
+            except pdf_extract.PdfTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except pdf_extract.PdfUnprocessable as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            stored = resume_store.store_extracted(user["id"], file.filename, sha256, size, text)
     finally:
-        put_conn(conn)
+        spooled.close()
 
-    # Analyze with Gemini
-    insights = analyze_profile(linkedin_json or {}, text)
+    if stored.status == "done" and stored.insights is not None:
+        print(f"[/profile/upload-resume] user_id={user['id']} reused résumé {sha256[:12]}")
+        return {"message": "Résumé analyzed", "resume_id": stored.id, "status": "done",
+                "insights": stored.insights, "reused": True}
 
-    # Save insights + persist resume text
-    conn = get_conn()
-    try:
-        with conn:
-            with conn.cursor() as cur:
-                # 1) persist the extracted résumé text for history/keywords
-                cur.execute("""
-                  INSERT INTO resume_texts (user_id, filename, extracted)
-                  VALUES (%s, %s, %s)
-                """, (user["id"], file.filename, text))
+    # Gemini analysis runs in the background; the client polls status_url
+    resume_analyzer.wake()
+    return JSONResponse(status_code=202, content={
+        "message": "Résumé uploaded; analysis in progress",
+        "resume_id": stored.id,
+        "status": stored.status,
+        "status_url": f"/profile/resume-status/{stored.id}",
+    })
 
-                # 2) update profile fields from insights
-                cur.execute("""
-                  INSERT INTO profiles (user_id, bio, tone, keywords)
-                  VALUES (%s, %s, %s, %s)
-                  ON CONFLICT (user_id) DO UPDATE
-                  SET bio=EXCLUDED.bio,
-                      tone=EXCLUDED.tone,
-                      keywords=EXCLUDED.keywords,
-                      updated_at=now()
-                """, (user["id"],
-                      insights.get("background_summary"),
-                      insights.get("tone", []),
-                      insights.get("keywords", [])))
-    finally:
-        put_conn(conn)
 
-    return {"message": "Résumé analyzed", "insights": insights}
+# a long-poll re-reads the row at least this often: another process may be analyzing it
+RESUME_STATUS_RECHECK_SEC = 5
 
 
-def _latest_resume_text(uid: int) -> str:
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-              SELECT extracted FROM resume_texts
-              WHERE user_id=%s
-              ORDER BY uploaded_at DESC
-              LIMIT 1
-            """, (uid,))
-            row = cur.fetchone()
-            return row[0] if row else ""
-    finally:
-        put_conn(conn)
+@router.get("/resume-status/{resume_id}")
+async def resume_status(resume_id: int, wait: float = 0, user=Depends(get_current_user)):
+    """
+    Poll target for résumé analysis: queued | analyzing | done | failed.
+    `wait` (seconds, up to 25) holds the request until the analysis settles, woken by this
+    process's analyzer, without holding a thread or a DB connection meanwhile.
+    """
+    deadline = time.monotonic() + min(max(wait, 0), 25)
+    while True:
+        changed = resume_analyzer.watch(resume_id)
+        try:
+            row = await asyncio.to_thread(resume_store.analysis_status, user["id"], resume_id)
+            if not row:
+                raise HTTPException(404, "Résumé not found")
+            status, error, insights, analyzed_at = row
+            left = deadline - time.monotonic()
+            if status in ("done", "failed") or left <= 0:
+                break
+            try:
+                await asyncio.wait_for(changed.wait(), min(left, RESUME_STATUS_RECHECK_SEC))
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            resume_analyzer.unwatch(resume_id, changed)
+    return {
+        "resume_id": resume_id,
+        "status": status,
+        "insights": insights if status == "done" else None,
+        "analyzed_at": analyzed_at.isoformat() if analyzed_at else None,
+        "error": error if status in ("failed", "queued") else None,
+    }
+
 
 STOP = set(("a an and are as at be by for from has have i in is it its of on or that the to with your you we our their they them this those these").split())
 def _top_keywords(text: str, k: int = 12):
@@ -169,10 +201,25 @@ def _top_keywords(text: str, k: int = 12):
     return [w for (w, _cnt) in Counter(words).most_common(k)]
 
 @router.get("/summary")
-def profile_summary(user=Depends(get_current_user)):
+def profile_summary(user=Depends(get_current_user), cond: Conditional = Depends()):
+    """Served from summary_cache with a strong ETag; a matching If-None-Match gets 304."""
     uid = user["id"]
+    cached, generation = summary_cache.get(uid)
+    if cached:
+        etag, body = cached
+        summary_cache.M_LOOKUPS.inc(result="hit")
+    else:
+        summary_cache.M_LOOKUPS.inc(result="miss")
+        body = _build_summary(uid)
+        etag = summary_cache.put(uid, generation, body)
+    not_modified = cond.check(etag, route="profile_summary")
+    if not_modified:
+        return not_modified
+    return cond.respond(body, etag)
 
-    # base join: users + profiles + linkedin_profile + resume presence
+
+def _build_summary(uid: int) -> dict:
+    # base join: users + profiles + linkedin_profile + current résumé
     conn = get_conn()
     try:
         with conn.cursor() as cur:
@@ -181,12 +228,15 @@ def profile_summary(user=Depends(get_current_user)):
                 u.name, u.email,
                 p.headline, p.bio, p.industries, p.goals, p.tone, p.keywords,
                 lp.li_id, lp.first_name, lp.last_name, lp.picture_url, lp.email AS li_email,
-                EXISTS(SELECT 1 FROM resume_texts r WHERE r.user_id=%s) AS has_resume
+                u.current_resume_id IS NOT NULL AS has_resume,
+                -- résumé text only when keywords must be derived from it
+                CASE WHEN COALESCE(cardinality(p.keywords), 0) = 0 THEN r.extracted END
               FROM users u
               LEFT JOIN profiles p ON p.user_id = u.id
               LEFT JOIN linkedin_profile lp ON lp.user_id = u.id
+              LEFT JOIN resume_texts r ON r.id = u.current_resume_id
               WHERE u.id=%s
-            """, (uid, uid))
+            """, (uid,))
             row = cur.fetchone()
             if not row:
                 raise HTTPException(404, "Profile not found")
@@ -196,7 +246,7 @@ def profile_summary(user=Depends(get_current_user)):
     (u_name, _u_email,
      headline, bio, industries, goals, tone, keywords,
      li_id, first_name, last_name, picture_url, li_email,
-     has_resume) = row
+     has_resume, resume_text) = row
 
     name = (f"{first_name or ''} {last_name or ''}").strip() or u_name
     industries = industries or []
@@ -204,9 +254,10 @@ def profile_summary(user=Depends(get_current_user)):
     keywords = keywords or []
 
     # derive keywords if missing (resume + bio + headline)
-    pile = " ".join(filter(None, [_latest_resume_text(uid), bio, headline]))
-    if not keywords and pile:
-        keywords = _top_keywords(pile, 12)
+    if not keywords:
+        pile = " ".join(filter(None, [resume_text, bio, headline]))
+        if pile:
+            keywords = _top_keywords(pile, 12)
 
     seed = (
         f"You are writing a LinkedIn post for {name}. "
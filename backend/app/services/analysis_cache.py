@@ -0,0 +1,114 @@
+# app/services/analysis_cache.py
+"""
+Content-addressed cache of analyze_profile results.
+
+The key is a SHA-256 of the prompt version and the normalized inputs (canonical LinkedIn
+JSON, whitespace-collapsed résumé text), so re-syncs, retries and re-uploads of the same
+data skip the Gemini call. Results live in Postgres (analysis_cache) with a small LRU in
+front of it. The prompt version is a hash of the prompt template and model: editing
+PROMPT changes every key, and rows from older versions are purged at startup.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.db import get_conn, put_conn
+from app.metrics import Counter
+
+LRU_SIZE = int(os.getenv("ANALYSIS_CACHE_LRU_SIZE", "256"))
+log = logging.getLogger("analysis_cache")
+
+M_LOOKUPS = Counter("analysis_cache_lookups_total", "analyze_profile cache lookups by result", ("result",))
+
+_lru: "OrderedDict[str, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def prompt_version(prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()[:16]
+
+
+def cache_key(version: str, linkedin: Optional[dict], resume_text: Optional[str]) -> str:
+    payload = {
+        "v": version,
+        "linkedin": linkedin or {},
+        "resume": re.sub(r"\s+", " ", resume_text or "").strip(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"),
+                                     default=str).encode()).hexdigest()
+
+
+def ensure_schema(version: str):
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key            CHAR(64) PRIMARY KEY,
+                    prompt_version TEXT NOT NULL,
+                    result         JSONB NOT NULL,
+                    created_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+            cur.execute("DELETE FROM analysis_cache WHERE prompt_version <> %s", (version,))
+            if cur.rowcount:
+                log.info("Purged %d analysis_cache rows from older prompt versions", cur.rowcount)
+    finally:
+        put_conn(conn)
+
+
+def _remember(key: str, result: dict) -> None:
+    with _lock:
+        _lru[key] = result
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def get(key: str) -> Optional[dict]:
+    with _lock:
+        hit = _lru.get(key)
+        if hit is not None:
+            _lru.move_to_end(key)
+    if hit is not None:
+        M_LOOKUPS.inc(result="memory")
+        return hit
+    try:
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT result FROM analysis_cache WHERE key=%s", (key,))
+                row = cur.fetchone()
+        finally:
+            put_conn(conn)
+    except Exception as e:  # the cache must never fail an analysis
+        log.warning("analysis_cache lookup failed: %s", e)
+        row = None
+    if row is None:
+        M_LOOKUPS.inc(result="miss")
+        return None
+    M_LOOKUPS.inc(result="db")
+    _remember(key, row[0])
+    return row[0]
+
+
+def put(key: str, version: str, result: dict) -> None:
+    _remember(key, result)
+    try:
+        conn = get_conn()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO analysis_cache (key, prompt_version, result)
+                    VALUES (%s, %s, %s::jsonb)
+                    ON CONFLICT (key) DO NOTHING
+                """, (key, version, json.dumps(result)))
+        finally:
+            put_conn(conn)
+    except Exception as e:
+        log.warning("analysis_cache store failed: %s", e)
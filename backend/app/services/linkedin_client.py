@@ -0,0 +1,330 @@
+# app/services/linkedin_client.py
+"""
+The one place that talks HTTP to LinkedIn.
+
+All calls share a long-lived requests.Session with a sized connection pool, so
+api.linkedin.com / www.linkedin.com keep-alive connections are reused and only the
+first call per connection pays for TCP+TLS. Each endpoint has its own
+(connect, read) timeout, circuit breaker and adaptive concurrency limit, so a
+degraded LinkedIn costs callers a fast 503 instead of a 20 s timeout.
+Async callers get the same pool via a worker thread.
+"""
+import asyncio
+import os
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.metrics import Gauge, Histogram
+from app.services.resilience import AdaptiveLimiter, CircuitBreaker, CircuitOpen
+
+API_BASE = os.getenv("LINKEDIN_API_BASE", "https://api.linkedin.com")
+OAUTH_BASE = os.getenv("LINKEDIN_OAUTH_BASE", "https://www.linkedin.com")
+
+POOL_MAXSIZE = int(os.getenv("LINKEDIN_POOL_MAXSIZE", "32"))
+CONNECT_TIMEOUT = float(os.getenv("LINKEDIN_CONNECT_TIMEOUT", "3.05"))
+
+# endpoint -> read timeout (seconds)
+READ_TIMEOUTS = {
+    "ugcPosts": float(os.getenv("LINKEDIN_PUBLISH_TIMEOUT", "20")),
+    "ugcPosts.lookup": 15.0,
+    "assets.register": 10.0,
+    "assets.upload": float(os.getenv("LINKEDIN_UPLOAD_TIMEOUT", "60")),
+    "userinfo": 10.0,
+    "accessToken": 15.0,
+}
+
+# endpoint -> latency above which a call counts as slow for the limiter (seconds)
+TARGET_LATENCIES = {
+    "ugcPosts": float(os.getenv("LINKEDIN_PUBLISH_TARGET_LATENCY", "3")),
+    "ugcPosts.lookup": 2.0,
+    "assets.register": 2.0,
+    "assets.upload": 10.0,
+    "userinfo": 1.5,
+    "accessToken": 2.0,
+}
+BREAKER_COOLDOWN_SEC = float(os.getenv("LINKEDIN_BREAKER_COOLDOWN_SECONDS", "30"))
+
+M_LATENCY = Histogram("linkedin_request_seconds", "LinkedIn API latency", ("endpoint", "status"),
+                      buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30))
+M_BREAKER_OPEN = Gauge("linkedin_circuit_open", "1 while the endpoint's circuit breaker is open", ("endpoint",))
+M_LIMIT = Gauge("linkedin_concurrency_limit", "Current adaptive concurrency limit", ("endpoint",))
+
+
+class LinkedInError(RuntimeError):
+    """Non-2xx answer from LinkedIn. `status_code` is the HTTP status, `message` its best-effort text."""
+
+    def __init__(self, endpoint: str, status_code: int, message: str, headers: Optional[dict] = None):
+        super().__init__(f"LinkedIn {endpoint} failed: {status_code} {message[:300]}")
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers or {}
+
+
+class LinkedInUnavailable(LinkedInError):
+    """We refused to call LinkedIn: breaker open or concurrency limit saturated."""
+
+    def __init__(self, endpoint: str, retry_after: float, reason: str):
+        super().__init__(endpoint, 503, f"LinkedIn temporarily unavailable ({reason})")
+        self.retry_after = retry_after
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_limiters: dict[str, AdaptiveLimiter] = {}
+_guards_lock = threading.Lock()
+
+
+def _guards(endpoint: str) -> tuple[CircuitBreaker, AdaptiveLimiter]:
+    with _guards_lock:
+        if endpoint not in _breakers:
+            read_timeout = READ_TIMEOUTS.get(endpoint, 20.0)
+            _breakers[endpoint] = CircuitBreaker(
+                endpoint, slow_call_sec=read_timeout / 2, cooldown_sec=BREAKER_COOLDOWN_SEC)
+            _limiters[endpoint] = AdaptiveLimiter(
+                endpoint, initial=min(8, POOL_MAXSIZE), max_limit=POOL_MAXSIZE,
+                target_latency_sec=TARGET_LATENCIES.get(endpoint, 2.0))
+        return _breakers[endpoint], _limiters[endpoint]
+
+
+def is_open(endpoint: str) -> bool:
+    """True while calls to `endpoint` are being short-circuited."""
+    return _guards(endpoint)[0].is_open()
+
+
+def _is_failure(status: Optional[int]) -> bool:
+    # 4xx are the caller's problem, not a sign LinkedIn is degraded. That includes 429:
+    # LinkedIn throttles per member, and one busy member must not open the app-wide breaker
+    # or shrink the limiter for everyone (publish_admission backs off that member instead).
+    return status is None or status >= 500
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                # no transparent retries: a retried POST to ugcPosts could double-post
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _request(endpoint: str, method: str, url: str, **kw) -> requests.Response:
+    kw.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUTS.get(endpoint, 20.0)))
+    breaker, limiter = _guards(endpoint)
+    try:
+        if breaker.is_open():
+            raise CircuitOpen(endpoint, breaker.retry_after())
+        limiter.acquire()
+        try:
+            breaker.before_call()
+        except CircuitOpen:
+            limiter.cancel()
+            raise
+    except CircuitOpen as e:
+        M_BREAKER_OPEN.set(1 if breaker.state != breaker.CLOSED else 0, endpoint=endpoint)
+        raise LinkedInUnavailable(endpoint, e.retry_after, e.reason) from e
+
+    t0 = time.perf_counter()
+    status: Optional[int] = None
+    try:
+        r = get_session().request(method, url, **kw)
+        status = r.status_code
+        return r
+    finally:
+        latency = time.perf_counter() - t0
+        failed = _is_failure(status)
+        limiter.release(failed, latency)
+        breaker.record(failed, latency)
+        M_LATENCY.observe(latency, endpoint=endpoint, status=str(status or "error"))
+        M_BREAKER_OPEN.set(1 if breaker.state != breaker.CLOSED else 0, endpoint=endpoint)
+        M_LIMIT.set(int(limiter.limit), endpoint=endpoint)
+
+
+def _error(endpoint: str, r: requests.Response) -> LinkedInError:
+    try:
+        msg = r.json().get("message") or r.text
+    except Exception:
+        msg = r.text
+    return LinkedInError(endpoint, r.status_code, msg or "", dict(r.headers))
+
+
+def _auth_headers(access_token: str) -> dict:
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "X-Restli-Protocol-Version": "2.0.0",
+    }
+
+
+# ----------------------------- Posts -----------------------------
+def ugc_post_body(li_id: str, text: str, visibility: str = "PUBLIC",
+                  media: Optional[list[str]] = None) -> dict:
+    share = {
+        "shareCommentary": {"text": text},
+        "shareMediaCategory": "IMAGE" if media else "NONE",
+    }
+    if media:
+        share["media"] = [{"status": "READY", "media": asset} for asset in media]
+    return {
+        "author": f"urn:li:person:{li_id}",
+        "lifecycleState": "PUBLISHED",
+        "specificContent": {"com.linkedin.ugc.ShareContent": share},
+        "visibility": {
+            "com.linkedin.ugc.MemberNetworkVisibility": visibility or "PUBLIC"
+        },
+    }
+
+
+def publish_text(access_token: str, li_id: str, text: str, visibility: str = "PUBLIC",
+                 media: Optional[list[str]] = None) -> str:
+    """Create a share (text, plus already-uploaded image assets); returns the post URN. Raises LinkedInError on non-2xx."""
+    r = _request("ugcPosts", "POST", f"{API_BASE}/v2/ugcPosts",
+                 headers=_auth_headers(access_token), json=ugc_post_body(li_id, text, visibility, media))
+    if r.status_code not in (200, 201):
+        raise _error("ugcPosts", r)
+    return r.headers.get("x-restli-id") or r.headers.get("location", "") or ""
+
+
+def find_post_by_text(access_token: str, li_id: str, text: str, count: int = 20,
+                      since: Optional[datetime] = None) -> Optional[str]:
+    """
+    Look for `text` among the member's most recent posts, ignoring any created before `since`.
+    Returns its URN, or None if it isn't there; raises LinkedInError if LinkedIn won't say.
+    """
+    author = urllib.parse.quote(f"urn:li:person:{li_id}", safe="")
+    url = f"{API_BASE}/v2/ugcPosts?q=authors&authors=List({author})&sortBy=LAST_MODIFIED&count={count}"
+    r = _request("ugcPosts.lookup", "GET", url, headers=_auth_headers(access_token))
+    if r.status_code != 200:
+        raise _error("ugcPosts.lookup", r)
+    want = (text or "").strip()
+    since_ms = since.timestamp() * 1000 if since else None
+    for el in r.json().get("elements", []):
+        share = (el.get("specificContent") or {}).get("com.linkedin.ugc.ShareContent") or {}
+        if ((share.get("shareCommentary") or {}).get("text") or "").strip() != want:
+            continue
+        # an older post with the same text is not this one (and one without a timestamp proves nothing)
+        created_ms = (el.get("created") or {}).get("time") or el.get("firstPublishedAt")
+        if since_ms is not None and (not created_ms or created_ms < since_ms):
+            continue
+        return el.get("id") or ""
+    return None
+
+
+# ----------------------------- Media -----------------------------
+def register_image_upload(access_token: str, li_id: str) -> tuple[str, str]:
+    """Ask LinkedIn for an upload slot for one feed image. Returns (upload_url, asset_urn)."""
+    body = {
+        "registerUploadRequest": {
+            "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+            "owner": f"urn:li:person:{li_id}",
+            "serviceRelationships": [
+                {"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}
+            ],
+        }
+    }
+    r = _request("assets.register", "POST", f"{API_BASE}/v2/assets?action=registerUpload",
+                 headers=_auth_headers(access_token), json=body)
+    if r.status_code not in (200, 201):
+        raise _error("assets.register", r)
+    value = r.json().get("value") or {}
+    mech = (value.get("uploadMechanism") or {}).get(
+        "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest") or {}
+    if not mech.get("uploadUrl") or not value.get("asset"):
+        raise LinkedInError("assets.register", r.status_code, "registerUpload returned no uploadUrl/asset")
+    return mech["uploadUrl"], value["asset"]
+
+
+def upload_image(upload_url: str, access_token: str, fileobj, size: int) -> None:
+    """
+    PUT the image bytes to `upload_url`. `fileobj` is read in blocks by the HTTP layer, so a
+    spooled temp file is streamed from disk rather than loaded into memory.
+    """
+    fileobj.seek(0)
+    r = _request("assets.upload", "PUT", upload_url, data=fileobj, headers={
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(size),
+    })
+    if r.status_code not in (200, 201):
+        raise _error("assets.upload", r)
+
+
+# ----------------------------- OAuth / OIDC -----------------------------
+def exchange_code(code: str, redirect_uri: str, client_id: str, client_secret: str) -> dict:
+    data = {
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": redirect_uri,
+        "client_id": client_id,
+        "client_secret": client_secret,
+    }
+    r = _request("accessToken", "POST", f"{OAUTH_BASE}/oauth/v2/accessToken", data=data)
+    if r.status_code != 200:
+        raise _error("accessToken", r)
+    return r.json()
+
+
+def refresh_access_token(refresh_token: str, client_id: str, client_secret: str) -> dict:
+    """Trade a refresh token for a new access token (only for apps LinkedIn granted refresh tokens)."""
+    data = {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+        "client_id": client_id,
+        "client_secret": client_secret,
+    }
+    r = _request("accessToken", "POST", f"{OAUTH_BASE}/oauth/v2/accessToken", data=data)
+    if r.status_code != 200:
+        raise _error("accessToken", r)
+    return r.json()
+
+
+def userinfo(access_token: str) -> dict:
+    r = _request("userinfo", "GET", f"{API_BASE}/v2/userinfo",
+                 headers={"Authorization": f"Bearer {access_token}"})
+    if r.status_code != 200:
+        raise _error("userinfo", r)
+    return r.json()
+
+
+# ----------------------------- async -----------------------------
+async def apublish_text(access_token: str, li_id: str, text: str, visibility: str = "PUBLIC",
+                        media: Optional[list[str]] = None) -> str:
+    return await asyncio.to_thread(publish_text, access_token, li_id, text, visibility, media)
+
+
+async def afind_post_by_text(access_token: str, li_id: str, text: str, count: int = 20,
+                             since: Optional[datetime] = None) -> Optional[str]:
+    return await asyncio.to_thread(find_post_by_text, access_token, li_id, text, count, since)
+
+
+async def aexchange_code(code: str, redirect_uri: str, client_id: str, client_secret: str) -> dict:
+    return await asyncio.to_thread(exchange_code, code, redirect_uri, client_id, client_secret)
+
+
+async def arefresh_access_token(refresh_token: str, client_id: str, client_secret: str) -> dict:
+    return await asyncio.to_thread(refresh_access_token, refresh_token, client_id, client_secret)
+
+
+async def auserinfo(access_token: str) -> dict:
+    return await asyncio.to_thread(userinfo, access_token)
@@ -0,0 +1,115 @@
+# app/services/linkedin_media.py
+"""
+Image uploads for LinkedIn posts: register upload -> stream bytes -> asset URN.
+
+Incoming files are spooled (small ones in memory, larger ones to a temp file) while
+their SHA-256 is computed, and the upload streams from the spool, so a 10 MB image
+never sits in memory whole. Assets are cached per (member, content hash): attaching
+the same image again reuses the asset URN and skips the upload.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+from app.db import get_conn, put_conn
+from app.services import linkedin_client
+
+log = logging.getLogger("linkedin_media")
+
+CHUNK_BYTES = 256 * 1024
+SPOOL_MAX_MEMORY = int(os.getenv("MEDIA_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+MAX_IMAGE_BYTES = int(os.getenv("MEDIA_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+ALLOWED_TYPES = {"image/jpeg", "image/png", "image/gif"}
+MAX_IMAGES_PER_POST = 9  # LinkedIn's limit for a multi-image share
+
+
+class MediaTooLarge(ValueError):
+    pass
+
+
+def ensure_schema():
+    """linkedin_media_assets: content-hash cache of uploaded images; posts.media_assets: what to attach."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS linkedin_media_assets (
+                    li_id      TEXT NOT NULL,
+                    sha256     CHAR(64) NOT NULL,
+                    asset_urn  TEXT NOT NULL,
+                    bytes      BIGINT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (li_id, sha256)
+                )
+            """)
+            cur.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS media_assets TEXT[]")
+    finally:
+        put_conn(conn)
+
+
+def spool(src: BinaryIO, max_bytes: int = MAX_IMAGE_BYTES) -> tuple[BinaryIO, str, int]:
+    """
+    Copy `src` into a SpooledTemporaryFile chunk by chunk, hashing as we go.
+    Returns (spooled_file, sha256_hex, size); the caller closes the file.
+    Raises MediaTooLarge as soon as `max_bytes` is exceeded.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = src.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise MediaTooLarge(f"image larger than {max_bytes // (1024 * 1024)} MB")
+            h.update(chunk)
+            out.write(chunk)
+    except BaseException:
+        out.close()
+        raise
+    out.seek(0)
+    return out, h.hexdigest(), size
+
+
+def _cached_asset(li_id: str, sha256: str) -> Optional[str]:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT asset_urn FROM linkedin_media_assets WHERE li_id=%s AND sha256=%s",
+                        (li_id, sha256))
+            row = cur.fetchone()
+            return row[0] if row else None
+    finally:
+        put_conn(conn)
+
+
+def _remember_asset(li_id: str, sha256: str, asset_urn: str, size: int) -> None:
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO linkedin_media_assets (li_id, sha256, asset_urn, bytes)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (li_id, sha256) DO NOTHING
+            """, (li_id, sha256, asset_urn, size))
+    finally:
+        put_conn(conn)
+
+
+def upload_image(access_token: str, li_id: str, fileobj: BinaryIO, sha256: str, size: int) -> tuple[str, bool]:
+    """
+    Upload a spooled image (see spool()) unless this member already uploaded the same bytes.
+    Returns (asset_urn, cached). Raises LinkedInError from the register/upload calls.
+    """
+    asset = _cached_asset(li_id, sha256)
+    if asset:
+        return asset, True
+    upload_url, asset = linkedin_client.register_image_upload(access_token, li_id)
+    linkedin_client.upload_image(upload_url, access_token, fileobj, size)
+    _remember_asset(li_id, sha256, asset, size)
+    log.info("Uploaded image %s (%d bytes) as %s", sha256[:12], size, asset)
+    return asset, False
@@ -0,0 +1,87 @@
+# app/services/linkedin_profile.py
+"""
+linkedin_profile writes with change detection.
+
+Each row stores a SHA-256 of its canonical userinfo JSON (raw_hash). A sync whose payload
+hashes the same only bumps fetched_at, so frequent syncs don't keep rewriting raw_json.
+Rows fetched within FRESH_SEC aren't fetched again at all unless forced.
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from app.db import get_conn, put_conn
+from app.metrics import Counter
+from app.services import summary_cache
+
+FRESH_SEC = int(os.getenv("LINKEDIN_PROFILE_FRESH_SECONDS", "900"))
+
+M_SYNC = Counter("linkedin_profile_sync_total", "Profile syncs by result", ("result",))
+
+
+def ensure_schema():
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("ALTER TABLE linkedin_profile ADD COLUMN IF NOT EXISTS raw_hash CHAR(64)")
+            cur.execute("CREATE INDEX IF NOT EXISTS linkedin_profile_fetched_idx ON linkedin_profile (fetched_at)")
+    finally:
+        put_conn(conn)
+
+
+def profile_hash(ui: dict) -> str:
+    return hashlib.sha256(json.dumps(ui, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def save_profiles(entries: list[tuple[int, dict, Optional[str]]]) -> int:
+    """
+    Persist freshly fetched userinfo payloads: (user_id, userinfo, stored_hash) each.
+    Changed payloads are upserted in one statement, unchanged ones only get fetched_at bumped.
+    Returns how many rows were rewritten.
+    """
+    changed, unchanged = [], []
+    for uid, ui, old_hash in entries:
+        h = profile_hash(ui)
+        (unchanged if h == old_hash else changed).append((uid, ui, h))
+    M_SYNC.inc(len(changed), result="updated")
+    M_SYNC.inc(len(unchanged), result="unchanged")
+    if not entries:
+        return 0
+
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            if changed:
+                cur.execute("""
+                    INSERT INTO linkedin_profile
+                      (user_id, li_id, first_name, last_name, picture_url, email, raw_json, raw_hash)
+                    SELECT v.user_id, v.li_id, v.first_name, v.last_name, v.picture, v.email, v.raw::jsonb, v.raw_hash
+                    FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+                         AS v(user_id, li_id, first_name, last_name, picture, email, raw, raw_hash)
+                    ON CONFLICT (user_id) DO UPDATE
+                    SET li_id=EXCLUDED.li_id,
+                        first_name=EXCLUDED.first_name,
+                        last_name=EXCLUDED.last_name,
+                        picture_url=EXCLUDED.picture_url,
+                        email=EXCLUDED.email,
+                        raw_json=EXCLUDED.raw_json,
+                        raw_hash=EXCLUDED.raw_hash,
+                        fetched_at=now()
+                """, (
+                    [uid for uid, _ui, _h in changed],
+                    [ui.get("sub") for _uid, ui, _h in changed],
+                    [ui.get("given_name") or "" for _uid, ui, _h in changed],
+                    [ui.get("family_name") or "" for _uid, ui, _h in changed],
+                    [ui.get("picture") for _uid, ui, _h in changed],
+                    [ui.get("email") for _uid, ui, _h in changed],
+                    [json.dumps(ui) for _uid, ui, _h in changed],
+                    [h for _uid, _ui, h in changed],
+                ))
+            if unchanged:
+                cur.execute("UPDATE linkedin_profile SET fetched_at=now() WHERE user_id = ANY(%s)",
+                            ([uid for uid, _ui, _h in unchanged],))
+    finally:
+        put_conn(conn)
+    summary_cache.invalidate_many(uid for uid, _ui, _h in changed)
+    return len(changed)
@@ -1,8 +1,48 @@
 # app/services/linkedin_publish.py
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
 import requests
-from datetime import datetime, timezone
 from fastapi import HTTPException
 from app.db import get_conn, put_conn
+from app.services import linkedin_client, publish_admission
+from app.services.linkedin_client import LinkedInError, LinkedInUnavailable
+
+log = logging.getLogger("linkedin_publish")
+
+# A 'pending' attempt younger than this is assumed to still be in flight somewhere.
+IN_FLIGHT_SEC = int(os.getenv("PUBLISH_IN_FLIGHT_SECONDS", "90"))
+# Reconciliation only accepts posts created after the attempt began, less this much
+# allowance for LinkedIn's clock running behind ours.
+CLOCK_SKEW_SEC = 5
+
+
+def ensure_schema():
+    """publish_attempts: one row per idempotency key, written before we call LinkedIn."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                "ALTER TABLE posts ADD COLUMN IF NOT EXISTS published_at TIMESTAMPTZ, "
+                "ADD COLUMN IF NOT EXISTS linkedin_urn TEXT, "
+                "ADD COLUMN IF NOT EXISTS status VARCHAR(20)"
+            )
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS publish_attempts (
+                    idem_key     TEXT PRIMARY KEY,
+                    user_id      INT NOT NULL,
+                    status       VARCHAR(20) NOT NULL,
+                    linkedin_urn TEXT,
+                    last_error   TEXT,
+                    attempts     INT NOT NULL DEFAULT 1,
+                    created_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    updated_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            """)
+    finally:
+        put_conn(conn)
 
 def _get_li_token_and_id(uid: int):
     conn = get_conn()
@@ -25,32 +65,192 @@ def _get_li_token_and_id(uid: int):
         put_conn(conn)
     return access_token, li_id
 
-def publish_to_linkedin(uid: int, text: str, visibility: str = "PUBLIC") -> str:
+def linkedin_http_error(e: LinkedInError) -> HTTPException:
+    """Map a LinkedIn API failure to the 502/503 our routes return, with a hint for the usual causes."""
+    msg = e.message or ""
+    if isinstance(e, LinkedInUnavailable):
+        # fail fast while LinkedIn is degraded instead of holding the worker
+        return HTTPException(
+            status_code=503,
+            detail=f"{msg}. Please retry shortly.",
+            headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))},
+        )
+    if e.status_code == 429:
+        retry_after = publish_admission.retry_after_seconds(e.headers)
+        return HTTPException(
+            status_code=429,
+            detail="LinkedIn is rate limiting this account. Please retry later.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.5)))},
+        )
+    if e.status_code == 403:
+        return HTTPException(
+            status_code=502,
+            detail=("LinkedIn 403 Forbidden: app lacks Share on LinkedIn product OR this token "
+                    "didn’t grant w_member_social. Reconnect LinkedIn and ensure product access. "
+                    f"Raw: {msg[:300]}")
+        )
+    if e.status_code == 401:
+        return HTTPException(502, "LinkedIn 401 Unauthorized: token expired/invalid. Reconnect.")
+    if e.status_code == 400:
+        return HTTPException(502, f"LinkedIn 400 Bad Request: payload/author issue. Raw: {msg[:300]}")
+    return HTTPException(502, f"LinkedIn error {e.status_code}: {msg[:300]}")
+
+def publish_to_linkedin(uid: int, text: str, visibility: str = "PUBLIC", idem_key: Optional[str] = None) -> str:
     access_token, li_id = _get_li_token_and_id(uid)
-    author_urn = f"urn:li:person:{li_id}"
-
-    url = "https://api.linkedin.com/v2/ugcPosts"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "X-Restli-Protocol-Version": "2.0.0",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "author": author_urn,
-        "lifecycleState": "PUBLISHED",
-        "specificContent": {
-            "com.linkedin.ugc.ShareContent": {
-                "shareCommentary": {"text": text},
-                "shareMediaCategory": "NONE",
-            }
-        },
-        "visibility": {
-            "com.linkedin.ugc.MemberNetworkVisibility": visibility
-        },
-    }
-
-    r = requests.post(url, headers=headers, json=body, timeout=20)
-    if r.status_code not in (201, 200):
-        raise HTTPException(status_code=502, detail=f"LinkedIn publish failed: {r.status_code} {r.text}")
-
-    return r.headers.get("x-restli-id") or r.headers.get("location", "")
+    try:
+        if idem_key:
+            return publish_once(idem_key, uid, access_token, li_id, text, visibility)
+        return linkedin_client.publish_text(access_token, li_id, text, visibility)
+    except (LinkedInError, PublishInProgress, PublishOutcomeUnknown, requests.RequestException) as e:
+        raise publish_http_error(e)
+
+
+# ----------------------------- idempotent publishing -----------------------------
+class PublishInProgress(RuntimeError):
+    """Another attempt with the same key is still talking to LinkedIn."""
+
+
+class PublishOutcomeUnknown(RuntimeError):
+    """LinkedIn may or may not have created the post and we couldn't check; don't retry blindly."""
+
+
+def post_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def scheduled_key(sp_id: int) -> str:
+    return f"sched:{sp_id}"
+
+
+def _claim_attempt(key: str, uid: int) -> tuple[str, Optional[str], bool, datetime]:
+    """
+    Register an attempt for `key` before calling LinkedIn.
+    Returns (status, urn, claimed, created_at): claimed=True means we own the attempt and may
+    publish (subject to reconciliation when the previous attempt's outcome is unknown);
+    created_at is when the key's first attempt began.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO publish_attempts (idem_key, user_id, status)
+                VALUES (%s, %s, 'pending')
+                ON CONFLICT (idem_key) DO NOTHING
+                RETURNING created_at
+            """, (key, uid))
+            row = cur.fetchone()
+            if row:
+                return "new", None, True, row[0]
+            # existing key: take it over unless it is posted or genuinely in flight
+            cur.execute("""
+                SELECT status, linkedin_urn, updated_at > now() - make_interval(secs => %s), created_at
+                FROM publish_attempts WHERE idem_key=%s FOR UPDATE
+            """, (IN_FLIGHT_SEC, key))
+            status, urn, fresh, created_at = cur.fetchone()
+            if status == "posted" or (status == "pending" and fresh):
+                return status, urn, False, created_at
+            cur.execute("""
+                UPDATE publish_attempts
+                SET status='pending', attempts=attempts + 1, updated_at=now()
+                WHERE idem_key=%s
+            """, (key,))
+            return status, urn, True, created_at
+    finally:
+        put_conn(conn)
+
+
+def _record_attempt(key: str, status: str, urn: Optional[str] = None, error: Optional[str] = None) -> None:
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE publish_attempts
+                SET status=%s, linkedin_urn=COALESCE(%s, linkedin_urn), last_error=%s, updated_at=now()
+                WHERE idem_key=%s
+            """, (status, urn, error, key))
+    finally:
+        put_conn(conn)
+
+
+def _is_ambiguous(e: Exception) -> bool:
+    """Could LinkedIn have created the post even though we didn't get a 2xx back?"""
+    if isinstance(e, LinkedInUnavailable) or isinstance(e, requests.ConnectTimeout):
+        return False  # request never left this process / never reached LinkedIn
+    if isinstance(e, LinkedInError):
+        return e.status_code >= 500 and e.status_code != 503
+    return isinstance(e, (requests.Timeout, requests.ConnectionError))
+
+
+def _reconcile(key: str, access_token: str, li_id: str, text: str, since: datetime) -> Optional[str]:
+    """
+    Look the post up on LinkedIn. URN if it exists, None if it doesn't; raises if we can't tell.
+    Only posts created since the key's first attempt count: the member may have posted the
+    same text before.
+    """
+    try:
+        urn = linkedin_client.find_post_by_text(access_token, li_id, text,
+                                                since=since - timedelta(seconds=CLOCK_SKEW_SEC))
+    except Exception as e:
+        _record_attempt(key, "unknown", error=f"reconcile failed: {e}"[:1000])
+        raise PublishOutcomeUnknown(
+            "LinkedIn may already have this post and we couldn't verify it; not retrying automatically"
+        ) from e
+    if urn is not None:
+        _record_attempt(key, "posted", urn=urn)
+    return urn
+
+
+def publish_once(key: str, uid: int, access_token: str, li_id: str, text: str,
+                 visibility: str = "PUBLIC", media: Optional[list[str]] = None) -> str:
+    """
+    Publish `text` at most once per idempotency `key`.
+
+    The attempt is recorded before the HTTP call. A key that already posted returns the stored
+    URN without calling LinkedIn; a key whose earlier attempt ended ambiguously (timeout, 5xx,
+    crash) is first reconciled by looking for the post. Raises PublishInProgress,
+    PublishOutcomeUnknown or the underlying LinkedInError.
+    """
+    prev_status, prev_urn, claimed, started_at = _claim_attempt(key, uid)
+    if prev_status == "posted":
+        return prev_urn or ""
+    if not claimed:
+        raise PublishInProgress(f"publish {key} already in progress")
+    if prev_status in ("pending", "unknown"):
+        found = _reconcile(key, access_token, li_id, text, started_at)
+        if found is not None:
+            log.info("Reconciled %s: already on LinkedIn as %s", key, found)
+            return found
+
+    try:
+        urn = linkedin_client.publish_text(access_token, li_id, text, visibility, media)
+    except Exception as e:
+        if isinstance(e, LinkedInError) and e.status_code == 429:
+            publish_admission.throttled(uid, publish_admission.retry_after_seconds(e.headers))
+        if not _is_ambiguous(e):
+            _record_attempt(key, "failed", error=str(e)[:1000])
+            raise
+        log.warning("Ambiguous publish outcome for %s (%s); reconciling", key, e)
+        found = _reconcile(key, access_token, li_id, text, started_at)
+        if found is not None:
+            return found
+        # LinkedIn may still create or index the post: every later claim must look again first
+        _record_attempt(key, "unknown", error=str(e)[:1000])
+        raise PublishOutcomeUnknown(
+            f"LinkedIn didn't confirm the post ({e}) and it isn't visible yet; "
+            "it is looked up again before any retry"
+        ) from e
+    _record_attempt(key, "posted", urn=urn)
+    return urn
+
+
+def publish_http_error(e: Exception) -> HTTPException:
+    """HTTP error for a failed publish_once() call made on behalf of a route."""
+    if isinstance(e, PublishInProgress):
+        return HTTPException(409, "This post is already being published. Check again in a moment.")
+    if isinstance(e, PublishOutcomeUnknown):
+        return HTTPException(502, f"{e}. Check your LinkedIn feed before retrying.")
+    if isinstance(e, LinkedInError):
+        return linkedin_http_error(e)
+    if isinstance(e, requests.RequestException):
+        return HTTPException(504, f"LinkedIn did not respond: {e}")
+    return HTTPException(500, str(e))
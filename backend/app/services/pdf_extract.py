@@ -0,0 +1,219 @@
+# app/services/pdf_extract.py
+"""
+PDF text extraction off the request path.
+
+pdfminer is pure Python and CPU-bound: run inline, a long résumé holds the GIL for
+seconds and a hostile PDF can spin forever. Extraction therefore runs in a dedicated
+process pool. The default "fast" mode skips pdfminer's layout analysis and only collects
+text (see pdf_fasttext); long documents are split into page ranges across the pool's
+workers. Every job is bounded by a page count, by CPU seconds (RLIMIT_CPU inside
+the worker, Unix only) and by wall-clock seconds (the caller stops waiting and the pool
+is recycled).
+
+This module is imported by the pool's worker processes: keep its top level free of
+app imports (DB pool, settings) and heavy work.
+"""
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no RLIMIT_CPU, the wall-clock limit alone bounds a job
+    resource = None
+
+log = logging.getLogger("pdf_extract")
+
+MAX_UPLOAD_BYTES = int(os.getenv("RESUME_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+CPU_SEC = int(os.getenv("RESUME_EXTRACT_CPU_SECONDS", "10"))
+WALL_SEC = float(os.getenv("RESUME_EXTRACT_WALL_SECONDS", "20"))
+WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+MODE = os.getenv("RESUME_EXTRACT_MODE", "fast")  # "fast" (text only) | "layout"
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))  # 0 disables page fan-out
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+TASKS_PER_WORKER = 100  # recycle workers so pdfminer's caches can't grow forever
+
+
+class PdfTooLarge(Exception):
+    """Upload or page count over the limit (-> 413)."""
+
+
+class PdfUnprocessable(Exception):
+    """Not a readable PDF, or extraction hit the CPU/time limit (-> 422)."""
+
+
+# ----------------------------- worker side -----------------------------
+class _CpuLimit(Exception):
+    pass
+
+
+def _on_sigxcpu(_signum, _frame):
+    raise _CpuLimit()
+
+
+def _limit_cpu(cpu_sec: int) -> Optional[int]:
+    """Allow this process cpu_sec more CPU seconds, then SIGXCPU. Returns the hard limit to restore."""
+    if resource is None:
+        return None
+    # soft RLIMIT_CPU counts this process's total CPU time
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime) + cpu_sec
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    return hard
+
+
+def _extract_pages(pages, mode: str) -> str:
+    import io
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+
+    rsrcmgr = PDFResourceManager(caching=True)
+    out = io.StringIO()
+    if mode == "layout":
+        device = TextConverter(rsrcmgr, out, laparams=LAParams())
+    else:
+        from app.services.pdf_fasttext import TextOnlyDevice
+        device = TextOnlyDevice(rsrcmgr, out)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    for page in pages:
+        interpreter.process_page(page)
+    device.close()
+    return out.getvalue()
+
+
+def _extract_worker(data: bytes, max_pages: int, cpu_sec: int, mode: str, split_at: int,
+                    page_numbers: Optional[list[int]] = None) -> tuple[int, Optional[str]]:
+    """
+    Runs in a pool process. Returns (page_count, text); raises PdfTooLarge / PdfUnprocessable.
+    Without page_numbers: counts pages and, for documents of `split_at` pages or more
+    (split_at > 0), returns (page_count, None) so the caller can fan the pages out.
+    With page_numbers: extracts just those pages.
+    """
+    import io
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    hard = None
+    try:
+        hard = _limit_cpu(cpu_sec)
+        try:
+            doc = PDFDocument(PDFParser(io.BytesIO(data)))
+            if page_numbers is None:
+                pages = list(itertools.islice(PDFPage.create_pages(doc), max_pages + 1))
+            else:
+                wanted = set(page_numbers)
+                pages = [p for i, p in enumerate(itertools.islice(PDFPage.create_pages(doc), max(wanted) + 1))
+                         if i in wanted]
+        except _CpuLimit:
+            raise
+        except Exception as e:
+            raise PdfUnprocessable(f"Not a readable PDF: {type(e).__name__}")
+        if len(pages) > max_pages:
+            raise PdfTooLarge(f"Résumé has more than {max_pages} pages")
+        if page_numbers is None and 0 < split_at <= len(pages):
+            return len(pages), None
+        try:
+            return len(pages), _extract_pages(pages, mode)
+        except _CpuLimit:
+            raise
+        except Exception as e:
+            raise PdfUnprocessable(f"Could not extract text: {type(e).__name__}")
+    except _CpuLimit:
+        raise PdfUnprocessable(f"PDF took more than {cpu_sec}s of CPU to extract")
+    finally:
+        if hard is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+# ----------------------------- caller side -----------------------------
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads (uvicorn, scheduler) isn't safe
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                        max_tasks_per_child=TASKS_PER_WORKER)
+        return _pool
+
+
+def _recycle_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill a pool with a runaway job in it; the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for p in list(getattr(pool, "_processes", {}).values()):
+        p.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool(wait: bool = False) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _left(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+def _run(pool: ProcessPoolExecutor, data: bytes, max_pages: int, mode: str, deadline: float) -> str:
+    split_at = PARALLEL_MIN_PAGES if WORKERS > 1 else 0
+    count, text = pool.submit(_extract_worker, data, max_pages, CPU_SEC, mode, split_at
+                              ).result(timeout=_left(deadline))
+    if text is not None:
+        return text
+    # long document: a chunk of pages per worker, each re-parsing the (small) file
+    step = max(PAGES_PER_TASK, -(-count // WORKERS))
+    futs = [pool.submit(_extract_worker, data, max_pages, CPU_SEC, mode, 0, list(range(i, min(i + step, count))))
+            for i in range(0, count, step)]
+    try:
+        return "".join(f.result(timeout=_left(deadline))[1] for f in futs)
+    except BaseException:
+        for f in futs:
+            f.cancel()
+        raise
+
+
+def extract_text(data: bytes, max_pages: int = MAX_PAGES, mode: str = MODE) -> str:
+    """
+    Extract text from PDF bytes in the worker pool (blocking; call from a threadpool route).
+    mode is "fast" (text only) or "layout" (pdfminer's full layout analysis).
+    Raises PdfTooLarge or PdfUnprocessable.
+    """
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise PdfTooLarge(f"Résumé larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    for attempt in (1, 2):
+        pool = _get_pool()
+        try:
+            return _run(pool, data, max_pages, mode, time.monotonic() + WALL_SEC)
+        except FutureTimeout:
+            log.warning("PDF extraction exceeded %ss wall clock; recycling pool", WALL_SEC)
+            _recycle_pool(pool)
+            raise PdfUnprocessable(f"PDF took more than {WALL_SEC:.0f}s to extract")
+        except BrokenProcessPool:
+            # a worker died (ours or a neighbour's recycled pool); retry once on a fresh pool
+            _recycle_pool(pool)
+            if attempt == 2:
+                raise PdfUnprocessable("PDF extraction worker crashed")
+    raise PdfUnprocessable("PDF extraction failed")
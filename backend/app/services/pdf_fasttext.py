@@ -0,0 +1,57 @@
+# app/services/pdf_fasttext.py
+"""
+Text-only pdfminer device for the résumé "fast" extraction mode.
+
+pdfminer's TextConverter builds an LTChar per glyph and runs layout analysis (grouping
+into lines, boxes and reading order) before writing a single character. For keywords and
+a prompt we only need the words, so this device decodes each shown string straight to
+Unicode and inserts a space or newline wherever the text position jumps. Only imported
+inside the pdf_extract worker processes.
+"""
+from typing import TextIO
+
+from pdfminer.pdfdevice import PDFDevice
+from pdfminer.pdffont import PDFUnicodeNotDefined
+
+# a TJ adjustment this far left (thousandths of an em) is a word gap, not kerning
+WORD_GAP = 200
+
+
+class TextOnlyDevice(PDFDevice):
+    def __init__(self, rsrcmgr, outfp: TextIO):
+        super().__init__(rsrcmgr)
+        self.outfp = outfp
+        self._pos = None  # (x, y) of the text matrix when we last wrote
+        self._parts: list[str] = []
+
+    def begin_page(self, page, ctm):
+        self._pos = None
+        self._parts = []
+
+    def end_page(self, page):
+        self.outfp.write("".join(self._parts).strip())
+        self.outfp.write("\n\f")
+
+    def render_string(self, textstate, seq, ncs, graphicstate):
+        font = textstate.font
+        if font is None:
+            return
+        _a, _b, _c, _d, x, y = textstate.matrix
+        if self._pos is not None and self._parts:
+            px, py = self._pos
+            if abs(y - py) > max(1.0, (textstate.fontsize or 0) * 0.5):
+                self._parts.append("\n")
+            elif x != px and not self._parts[-1].endswith((" ", "\n")):
+                self._parts.append(" ")
+        self._pos = (x, y)
+
+        for obj in seq:
+            if isinstance(obj, (int, float)):
+                if -obj > WORD_GAP and self._parts and not self._parts[-1].endswith((" ", "\n")):
+                    self._parts.append(" ")
+                continue
+            for cid in font.decode(obj):
+                try:
+                    self._parts.append(font.to_unichr(cid))
+                except PDFUnicodeNotDefined:
+                    pass
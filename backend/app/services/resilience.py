@@ -0,0 +1,173 @@
+# app/services/resilience.py
+"""
+Circuit breaker, adaptive (AIMD) concurrency limiter and token bucket for outbound API calls.
+
+All are thread-safe: LinkedIn calls are made from request threads and from the
+scheduler's worker threads.
+"""
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of making a call while the breaker is open (or the limiter is saturated)."""
+
+    def __init__(self, name: str, retry_after: float, reason: str = "circuit open"):
+        super().__init__(f"{name}: {reason}, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Trips when, over the last `window_sec`, at least `min_calls` calls were made and
+    either the failure ratio or the slow-call ratio reaches `threshold`. Stays open for
+    `cooldown_sec`, then lets a single probe through (half-open) to decide.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, window_sec: float = 30, min_calls: int = 10, threshold: float = 0.5,
+                 slow_call_sec: float = 10, cooldown_sec: float = 30):
+        self.name = name
+        self.window_sec, self.min_calls, self.threshold = window_sec, min_calls, threshold
+        self.slow_call_sec, self.cooldown_sec = slow_call_sec, cooldown_sec
+        self.state = self.CLOSED
+        self._calls: deque[tuple[float, bool, bool]] = deque()  # (ts, failed, slow)
+        self._opened_at = 0.0
+        self._probe_out = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.cooldown_sec - time.monotonic())
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and self.retry_after() > 0
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.retry_after() > 0:
+                    raise CircuitOpen(self.name, self.retry_after())
+                self.state = self.HALF_OPEN
+                self._probe_out = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_out:
+                    raise CircuitOpen(self.name, self.cooldown_sec, "circuit half-open, probe in flight")
+                self._probe_out = True
+
+    def record(self, failed: bool, latency: float) -> None:
+        now = time.monotonic()
+        slow = latency >= self.slow_call_sec
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_out = False
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                return
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window_sec:
+                self._calls.popleft()
+            n = len(self._calls)
+            if self.state == self.CLOSED and n >= self.min_calls:
+                failures = sum(1 for _t, f, _s in self._calls if f)
+                slows = sum(1 for _t, _f, s in self._calls if s)
+                if failures / n >= self.threshold or slows / n >= self.threshold:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self.state = self.OPEN
+        self._opened_at = now
+        self._calls.clear()
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: +1/limit per fast success, x`backoff` when a call fails or
+    exceeds `target_latency_sec`. Callers wait up to `queue_timeout_sec` for a slot,
+    then fail fast with CircuitOpen rather than piling up behind a slow upstream.
+    """
+
+    def __init__(self, name: str, initial: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 target_latency_sec: float = 2.0, backoff: float = 0.75, queue_timeout_sec: float = 2.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit, self.max_limit = min_limit, max_limit
+        self.target_latency_sec, self.backoff = target_latency_sec, backoff
+        self.queue_timeout_sec = queue_timeout_sec
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        deadline = time.monotonic() + self.queue_timeout_sec
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise CircuitOpen(self.name, 1, f"concurrency limit {int(self.limit)} reached")
+                self._cond.wait(left)
+            self.in_flight += 1
+
+    def release(self, failed: bool, latency: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if failed or latency > self.target_latency_sec:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        """Give back a slot that was acquired but never used for a call."""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+class TokenBucket:
+    """
+    `rate` tokens/second up to `burst`. reserve() may take tokens the bucket doesn't have
+    yet (the balance goes negative) and returns how long the caller must wait for them,
+    so concurrent callers are handed consecutive slots instead of all waking at once.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:  # nothing accrues while blocked (_updated is then in the future)
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def wait_time(self, n: float = 1) -> float:
+        """Seconds until `n` tokens are available (0 = now). Does not consume."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._wait(now, n)
+
+    def _wait(self, now: float, n: float) -> float:
+        deficit = max(0.0, (n - self._tokens) / self.rate) if self.rate > 0 else float("inf")
+        return max(deficit, self._blocked_until - now)
+
+    def consume(self, n: float = 1) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= n
+
+    def block_for(self, seconds: float) -> None:
+        """Hand out nothing for `seconds` (upstream said Retry-After), then a single token to probe with."""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = max(self._updated, self._blocked_until)
@@ -0,0 +1,195 @@
+# app/services/resume_store.py
+"""
+résumé uploads keyed by content hash.
+
+The upload is streamed through SHA-256 into a bounded spool (memory, then a temp file),
+never read whole off the socket. resume_texts keeps the hash next to the extracted text
+and the Gemini insights, so re-uploading the same PDF is one indexed lookup: no
+extraction, no model call.
+
+users.current_resume_id points at the latest upload; older rows are pruned by
+app.jobs.resume_compactor. Analysis is not done in the upload request: a new row is stored with
+analysis_status='queued' and app.jobs.resume_analyzer picks it up
+(queued -> analyzing -> done | failed).
+"""
+import logging
+from typing import BinaryIO, NamedTuple, Optional
+
+from app.db import get_conn, put_conn
+from app.services import linkedin_media, pdf_extract, summary_cache
+
+log = logging.getLogger("resume_store")
+
+
+def ensure_schema():
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                ALTER TABLE resume_texts
+                  ADD COLUMN IF NOT EXISTS sha256 CHAR(64),
+                  ADD COLUMN IF NOT EXISTS bytes BIGINT,
+                  ADD COLUMN IF NOT EXISTS insights JSONB,
+                  ADD COLUMN IF NOT EXISTS analysis_status VARCHAR(16) NOT NULL DEFAULT 'done',
+                  ADD COLUMN IF NOT EXISTS analysis_error TEXT,
+                  ADD COLUMN IF NOT EXISTS analysis_attempts INT NOT NULL DEFAULT 0,
+                  ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+                  ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ,
+                  ADD COLUMN IF NOT EXISTS analyzed_at TIMESTAMPTZ
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS resume_texts_user_uploaded_idx
+                ON resume_texts (user_id, uploaded_at DESC)
+            """)
+            # users.current_resume_id: the résumé reads use, so they never sort history
+            cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS current_resume_id BIGINT")
+            cur.execute("""
+                UPDATE users u SET current_resume_id = l.id
+                FROM (
+                    SELECT DISTINCT ON (user_id) user_id, id FROM resume_texts
+                    ORDER BY user_id, uploaded_at DESC, id DESC
+                ) l
+                WHERE u.id = l.user_id AND u.current_resume_id IS NULL
+            """)
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS resume_texts_analysis_idx
+                ON resume_texts (uploaded_at) WHERE analysis_status IN ('queued', 'analyzing')
+            """)
+            # rows from before hashing keep sha256 NULL and never match
+            cur.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS resume_texts_user_sha_idx
+                ON resume_texts (user_id, sha256) WHERE sha256 IS NOT NULL
+            """)
+    finally:
+        put_conn(conn)
+
+
+def spool(src: BinaryIO) -> tuple[BinaryIO, str, int]:
+    """Spool + hash an upload (see linkedin_media.spool); raises PdfTooLarge past the limit."""
+    try:
+        return linkedin_media.spool(src, max_bytes=pdf_extract.MAX_UPLOAD_BYTES)
+    except linkedin_media.MediaTooLarge:
+        raise pdf_extract.PdfTooLarge(
+            f"Résumé larger than {pdf_extract.MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+
+
+class Stored(NamedTuple):
+    id: int
+    status: str  # queued | analyzing | done | failed
+    insights: Optional[dict]
+
+
+def reuse_existing(uid: int, sha256: str, filename: str) -> Optional[Stored]:
+    """
+    Same document uploaded before? Mark it the latest upload and return it. A finished
+    analysis is re-applied to the profile; a failed one is queued again. None when the
+    document hasn't been seen.
+    """
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                WITH r AS (
+                    UPDATE resume_texts
+                    SET filename=%s, uploaded_at=now(),
+                        analysis_status=CASE WHEN analysis_status='failed' THEN 'queued' ELSE analysis_status END,
+                        analysis_attempts=CASE WHEN analysis_status='failed' THEN 0 ELSE analysis_attempts END
+                    WHERE user_id=%s AND sha256=%s
+                    RETURNING id, user_id, analysis_status, insights
+                ),
+                cur_ptr AS (
+                    UPDATE users u SET current_resume_id = r.id FROM r WHERE u.id = r.user_id
+                ),
+                p AS (""" + profile_from_insights("r", "s.analysis_status = 'done'") + """)
+                SELECT id, analysis_status, insights FROM r
+            """, (filename, uid, sha256))
+            row = cur.fetchone()
+            if not row:
+                return None
+            stored = Stored(*row)
+    finally:
+        put_conn(conn)
+    summary_cache.invalidate(uid)
+    return stored
+
+
+def store_extracted(uid: int, filename: str, sha256: str, size: int, text: str) -> Stored:
+    """Persist a new upload's text, queued for analysis. A concurrent upload of the same file gets the same row."""
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+              WITH r AS (
+                INSERT INTO resume_texts (user_id, filename, extracted, sha256, bytes, analysis_status)
+                VALUES (%s, %s, %s, %s, %s, 'queued')
+                ON CONFLICT (user_id, sha256) WHERE sha256 IS NOT NULL DO UPDATE
+                SET filename=EXCLUDED.filename, uploaded_at=now()
+                RETURNING id, user_id, analysis_status, insights
+              ),
+              cur_ptr AS (
+                UPDATE users u SET current_resume_id = r.id FROM r WHERE u.id = r.user_id
+              )
+              SELECT id, analysis_status, insights FROM r
+            """, (uid, filename, text, sha256, size))
+            stored = Stored(*cur.fetchone())
+    finally:
+        put_conn(conn)
+    summary_cache.invalidate(uid)  # has_resume / keywords source changed
+    return stored
+
+
+def current_text(uid: int) -> str:
+    """Extracted text of the user's current résumé ("" if none)."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+              SELECT r.extracted FROM users u
+              JOIN resume_texts r ON r.id = u.current_resume_id
+              WHERE u.id=%s
+            """, (uid,))
+            row = cur.fetchone()
+            return row[0] if row else ""
+    finally:
+        put_conn(conn)
+
+
+def analysis_status(uid: int, resume_id: int) -> Optional[tuple]:
+    """(status, error, insights, analyzed_at) of one of the user's résumés, or None."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+              SELECT analysis_status, analysis_error, insights, analyzed_at
+              FROM resume_texts WHERE id=%s AND user_id=%s
+            """, (resume_id, uid))
+            return cur.fetchone()
+    finally:
+        put_conn(conn)
+
+
+def _json_text_array(expr: str) -> str:
+    return f"ARRAY(SELECT jsonb_array_elements_text(CASE WHEN jsonb_typeof({expr})='array' THEN {expr} ELSE '[]' END))"
+
+
+def profile_from_insights(src: str, cond: str = "TRUE") -> str:
+    """
+    SQL for a CTE step that copies résumé insights onto profiles from the rows of CTE `src`
+    (columns user_id, insights), so the résumé row and the profile are written in one
+    statement. Empty insight fields never overwrite what the profile already has. The
+    caller invalidates summary_cache once it has committed.
+    """
+    return f"""
+      INSERT INTO profiles (user_id, bio, tone, keywords)
+      SELECT s.user_id, s.insights->>'background_summary',
+             {_json_text_array("s.insights->'tone'")},
+             {_json_text_array("s.insights->'keywords'")}
+      FROM {src} s
+      WHERE s.insights IS NOT NULL AND {cond}
+      ON CONFLICT (user_id) DO UPDATE
+      SET bio=COALESCE(NULLIF(EXCLUDED.bio, ''), profiles.bio),
+          tone=CASE WHEN cardinality(EXCLUDED.tone) > 0 THEN EXCLUDED.tone ELSE profiles.tone END,
+          keywords=CASE WHEN cardinality(EXCLUDED.keywords) > 0 THEN EXCLUDED.keywords ELSE profiles.keywords END,
+          updated_at=now()
+      RETURNING user_id
+    """
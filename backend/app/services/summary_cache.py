@@ -0,0 +1,64 @@
+# app/services/summary_cache.py
+"""
+Per-user cache of the GET /profile/summary body and its strong ETag (see app.http_cache).
+
+Writes to anything the summary reads (profiles, résumés, the LinkedIn snapshot) call
+invalidate() after they commit. Each user has a generation number that invalidate()
+bumps, and a summary computed under an older generation is not stored, so a request
+that read the old rows can't put them back after the write. Entries also expire after
+PROFILE_SUMMARY_CACHE_SECONDS, which bounds staleness from writes made by other
+processes.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from app.http_cache import body_etag
+from app.metrics import Counter
+
+TTL_SEC = float(os.getenv("PROFILE_SUMMARY_CACHE_SECONDS", "60"))
+MAX_USERS = 10_000
+
+M_LOOKUPS = Counter("profile_summary_cache_total", "GET /profile/summary by cache result", ("result",))
+
+_entries: "OrderedDict[int, tuple[str, dict, float]]" = OrderedDict()  # uid -> (etag, body, expires)
+_generations: dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def get(uid: int) -> tuple[Optional[tuple[str, dict]], int]:
+    """((etag, body) or None, generation); pass the generation back to put()."""
+    with _lock:
+        gen = _generations.get(uid, 0)
+        hit = _entries.get(uid)
+        if hit is not None and hit[2] > time.monotonic():
+            _entries.move_to_end(uid)
+            return (hit[0], hit[1]), gen
+        if hit is not None:
+            del _entries[uid]
+    return None, gen
+
+
+def put(uid: int, generation: int, body: dict) -> str:
+    """Cache `body` unless the user was invalidated since get(); returns its ETag either way."""
+    etag = body_etag(body)
+    with _lock:
+        if _generations.get(uid, 0) == generation:
+            _entries[uid] = (etag, body, time.monotonic() + TTL_SEC)
+            _entries.move_to_end(uid)
+            while len(_entries) > MAX_USERS:
+                _entries.popitem(last=False)
+    return etag
+
+
+def invalidate(uid: int) -> None:
+    invalidate_many((uid,))
+
+
+def invalidate_many(uids: Iterable[int]) -> None:
+    with _lock:
+        for uid in uids:
+            _entries.pop(uid, None)
+            _generations[uid] = _generations.get(uid, 0) + 1
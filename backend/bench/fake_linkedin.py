@@ -0,0 +1,220 @@
+# bench/fake_linkedin.py
+"""
+Local stand-in for the slice of the LinkedIn API this backend talks to.
+Point LINKEDIN_API_BASE at FakeLinkedIn.base_url; nothing ever leaves the machine.
+
+Knobs:
+  latency / jitter   seconds added to every request
+  error_rate         fraction of publishes answered 500 (post NOT created)
+  ambiguous_rate     fraction of publishes created but answered 504 (client can't tell)
+  throttle_rps       global publish rate above which we answer 429 + Retry-After
+
+Also fakes the assets API (registerUpload + PUT of the bytes); publishes that reference
+an asset which was never uploaded are rejected with 400, like LinkedIn. For OAuth it
+serves POST /oauth/v2/accessToken (code "c" -> token "tok-c") and GET /v2/userinfo
+(token "tok-c" -> member "li-c", email c@example.test); point LINKEDIN_OAUTH_BASE at it too.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLinkedIn:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                 ambiguous_rate: float = 0.0, throttle_rps: float = 0.0, retry_after: int = 1,
+                 seed: int | None = None):
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.ambiguous_rate = error_rate, ambiguous_rate
+        self.throttle_rps, self.retry_after = throttle_rps, retry_after
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = throttle_rps
+        self._refilled = time.monotonic()
+        self._next_id = 7000000000000000000
+        # (monotonic_ts, author, text, urn) for every post that was actually created
+        self.posts: list[tuple[float, str, str, str]] = []
+        self.status_counts: Counter = Counter()
+        # asset urn -> (bytes, sha256) once its binary has been uploaded
+        self.uploads: dict[str, tuple[int, str]] = {}
+        self.registered = 0
+        self.post_media: dict[str, list[str]] = {}  # post urn -> asset urns
+        self._server: ThreadingHTTPServer | None = None
+
+    # ----- lifecycle -----
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        fake = self
+
+        class Handler(_Handler):
+            owner = fake
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ----- results -----
+    def duplicates(self) -> int:
+        """Posts created more than once for the same (author, text)."""
+        seen = Counter((a, t) for _ts, a, t, _u in self.posts)
+        return sum(n - 1 for n in seen.values() if n > 1)
+
+    # ----- behaviour -----
+    def _sleep(self) -> None:
+        d = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0)
+        if d > 0:
+            time.sleep(d)
+
+    def _throttled(self) -> bool:
+        if not self.throttle_rps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.throttle_rps, self._tokens + (now - self._refilled) * self.throttle_rps)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return False
+            return True
+
+    def _create_post(self, author: str, text: str) -> str:
+        with self._lock:
+            self._next_id += 1
+            urn = f"urn:li:share:{self._next_id}"
+            self.posts.append((time.monotonic(), author, text, urn))
+        return urn
+
+    def _register_upload(self) -> tuple[str, str]:
+        with self._lock:
+            self.registered += 1
+            n = self.registered
+        return f"{self.base_url}/mediaUpload/{n}", f"urn:li:digitalmediaAsset:D{n}"
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rnd.random()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    owner: FakeLinkedIn
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def _send(self, status: int, body: dict | None = None, headers: dict | None = None) -> None:
+        raw = json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+        self.owner.status_counts[status] += 1
+
+    def _read_body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n)
+
+    def do_POST(self):
+        fake = self.owner
+        path = urllib.parse.urlparse(self.path).path
+        raw = self._read_body()
+        fake._sleep()
+        if path == "/oauth/v2/accessToken":
+            form = urllib.parse.parse_qs(raw.decode())
+            code = (form.get("code") or [""])[0]
+            if not code:
+                return self._send(400, {"error": "invalid_request", "error_description": "missing code"})
+            return self._send(200, {"access_token": f"tok-{code}", "expires_in": 5184000})
+        body = json.loads(raw or b"{}")
+        if path == "/v2/assets":
+            upload_url, asset = fake._register_upload()
+            return self._send(200, {"value": {
+                "uploadMechanism": {
+                    "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest": {"uploadUrl": upload_url}
+                },
+                "asset": asset,
+            }})
+        if path != "/v2/ugcPosts":
+            return self._send(404, {"message": "not found"})
+        if fake._throttled():
+            return self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(fake.retry_after)})
+        roll = fake._roll()
+        if roll < fake.error_rate:
+            return self._send(500, {"message": "Internal Server Error"})
+        author = body.get("author", "")
+        share = (body.get("specificContent") or {}).get("com.linkedin.ugc.ShareContent") or {}
+        text = share.get("shareCommentary", {}).get("text", "")
+        media = [m.get("media") for m in share.get("media") or []]
+        missing = [a for a in media if a not in fake.uploads]
+        if missing:
+            return self._send(400, {"message": f"asset not uploaded: {missing[0]}"})
+        urn = fake._create_post(author, text)
+        if media:
+            fake.post_media[urn] = media
+        if roll < fake.error_rate + fake.ambiguous_rate:
+            return self._send(504, {"message": "Gateway Timeout"})
+        return self._send(201, {"id": urn}, {"x-restli-id": urn})
+
+    def do_PUT(self):
+        fake = self.owner
+        path = urllib.parse.urlparse(self.path).path
+        if not path.startswith("/mediaUpload/"):
+            return self._send(404, {"message": "not found"})
+        # consume the body in chunks, like a real upload endpoint would
+        left = int(self.headers.get("Content-Length") or 0)
+        h, size = hashlib.sha256(), 0
+        while left > 0:
+            chunk = self.rfile.read(min(left, 64 * 1024))
+            if not chunk:
+                break
+            h.update(chunk)
+            size += len(chunk)
+            left -= len(chunk)
+        fake._sleep()
+        n = path.rsplit("/", 1)[1]
+        fake.uploads[f"urn:li:digitalmediaAsset:D{n}"] = (size, h.hexdigest())
+        return self._send(201)
+
+    def do_GET(self):
+        fake = self.owner
+        parsed = urllib.parse.urlparse(self.path)
+        fake._sleep()
+        if parsed.path == "/v2/userinfo":
+            token = (self.headers.get("Authorization") or "").removeprefix("Bearer ")
+            if not token.startswith("tok-"):
+                return self._send(401, {"message": "Invalid access token"})
+            who = token[len("tok-"):]
+            return self._send(200, {"sub": f"li-{who}", "given_name": "Bench", "family_name": who,
+                                    "email": f"{who}@example.test", "picture": None})
+        if parsed.path != "/v2/ugcPosts":
+            return self._send(404, {"message": "not found"})
+        # q=authors&authors=List(urn%3Ali%3Aperson%3AX)
+        qs = urllib.parse.unquote(parsed.query)
+        author = qs.split("List(", 1)[1].split(")", 1)[0] if "List(" in qs else ""
+        mine = [p for p in fake.posts if p[1] == author][-20:]
+        wall = time.time() - time.monotonic()  # posts are stamped with the monotonic clock
+        elements = [{
+            "id": urn,
+            "author": a,
+            "created": {"time": int((wall + ts) * 1000)},
+            "specificContent": {"com.linkedin.ugc.ShareContent": {"shareCommentary": {"text": t}}},
+        } for ts, a, t, urn in reversed(mine)]
+        return self._send(200, {"elements": elements})
@@ -0,0 +1,113 @@
+# bench/media_bench.py
+"""
+End-to-end check of the image pipeline against a local Postgres and the fake LinkedIn.
+
+Seeds an isolated `media_bench` schema (DB_* env from .env, like the app), then for a
+generated image of `--mb` MB: spools + hashes it, uploads it (register -> PUT), uploads
+the same bytes again (must hit the content-hash cache), and publishes a post carrying
+the asset. Reports timings and the peak Python heap used while uploading, and exits
+non-zero if the fake saw the wrong calls.
+
+    cd backend
+    python -m bench.media_bench --mb 8
+
+Never point this at a database you care about: it drops and recreates `media_bench`.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench.fake_linkedin import FakeLinkedIn
+
+BENCH_SCHEMA = "media_bench"
+
+SCHEMA_SQL = f"""
+DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;
+CREATE SCHEMA {BENCH_SCHEMA};
+CREATE TABLE users (id SERIAL PRIMARY KEY, name TEXT, email TEXT UNIQUE);
+CREATE TABLE posts (
+    id BIGSERIAL PRIMARY KEY, user_id INT REFERENCES users(id), idea_id INT, format TEXT,
+    draft_text TEXT, hashtags TEXT[], created_at TIMESTAMPTZ DEFAULT now()
+);
+"""
+
+
+def _parse_args(argv):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mb", type=float, default=8, help="size of the generated image")
+    ap.add_argument("--latency", type=float, default=0.0)
+    return ap.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    fake = FakeLinkedIn(latency=args.latency)
+    base_url = fake.start()
+    os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA}"
+    os.environ["LINKEDIN_API_BASE"] = base_url
+    os.environ.setdefault("MEDIA_MAX_IMAGE_BYTES", str(int((args.mb + 1) * 1024 * 1024)))
+
+    from app.db import get_conn, put_conn
+    from app.services import linkedin_media, linkedin_publish
+
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+            cur.execute("INSERT INTO users (name, email) VALUES ('bench', 'bench@example.test') RETURNING id")
+            uid = cur.fetchone()[0]
+    finally:
+        put_conn(conn)
+    linkedin_publish.ensure_schema()
+    linkedin_media.ensure_schema()
+
+    size = int(args.mb * 1024 * 1024)
+    with tempfile.TemporaryFile() as img:
+        for _ in range(0, size, 1024 * 1024):
+            img.write(os.urandom(min(1024 * 1024, size - img.tell())))
+
+        def upload_once() -> tuple[str, bool, float, int]:
+            img.seek(0)
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            spooled, sha, n = linkedin_media.spool(img)
+            try:
+                asset, cached = linkedin_media.upload_image("tok", "bench", spooled, sha, n)
+            finally:
+                spooled.close()
+            took = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return asset, cached, took, peak
+
+        asset1, cached1, t1, peak1 = upload_once()
+        asset2, cached2, t2, _peak2 = upload_once()
+
+    urn = linkedin_publish.publish_once("bench:media", uid, "tok", "bench", "post with an image",
+                                        "PUBLIC", [asset1])
+    fake.stop()
+
+    print(f"image size          {size / 1024 / 1024:10.1f} MB")
+    print(f"first upload        {t1 * 1000:10.1f} ms   peak Python heap {peak1 / 1024 / 1024:.2f} MB")
+    print(f"repeat upload       {t2 * 1000:10.1f} ms   cached={cached2}")
+    print(f"registerUpload hits {fake.registered:10d}")
+    print(f"published           {urn}  media={fake.post_media.get(urn)}")
+
+    problems = []
+    if cached1 or not cached2 or asset1 != asset2:
+        problems.append("content-hash cache did not dedupe the second upload")
+    if fake.registered != 1 or fake.uploads.get(asset1, (0,))[0] != size:
+        problems.append(f"expected one {size}-byte upload, fake saw {fake.uploads}")
+    if fake.post_media.get(urn) != [asset1]:
+        problems.append("published post does not reference the uploaded asset")
+    for p in problems:
+        print("FAIL:", p)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
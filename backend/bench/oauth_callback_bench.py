@@ -0,0 +1,126 @@
+# bench/oauth_callback_bench.py
+"""
+OAuth callback latency against a local Postgres and the fake LinkedIn token/userinfo endpoints.
+
+Seeds an isolated `oauth_bench` schema (DB_* / JWT_SECRET env from .env, like the app) and
+calls the /oauth/linkedin/callback handler directly with freshly signed states: first
+sign-ins for `--users` new members, then a repeat sign-in for each. Reports p50/p95/p99 per
+phase; `--latency` is added to each fake LinkedIn call, so 0 isolates our own overhead.
+
+    cd backend
+    python -m bench.oauth_callback_bench --users 500 --latency 0.05
+
+Never point this at a database you care about: it drops and recreates `oauth_bench`.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fake_linkedin import FakeLinkedIn
+
+BENCH_SCHEMA = "oauth_bench"
+
+SCHEMA_SQL = f"""
+DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;
+CREATE SCHEMA {BENCH_SCHEMA};
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY, name TEXT, email TEXT UNIQUE, country_code TEXT, mobile TEXT,
+    linkedin_id TEXT, password_hash TEXT NOT NULL, is_active BOOLEAN DEFAULT TRUE, onboarded BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT now(), updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE tokens_linkedin (
+    user_id INT PRIMARY KEY REFERENCES users(id), access_token TEXT, expires_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE linkedin_profile (
+    user_id INT PRIMARY KEY REFERENCES users(id), li_id TEXT, first_name TEXT, last_name TEXT,
+    picture_url TEXT, email TEXT, raw_json JSONB, fetched_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE INDEX ON linkedin_profile (li_id);
+CREATE TABLE scheduled_posts (
+    id BIGSERIAL PRIMARY KEY, user_id INT REFERENCES users(id), text TEXT,
+    scheduled_at TIMESTAMPTZ, status VARCHAR(20), provider VARCHAR(20), last_error TEXT,
+    created_at TIMESTAMPTZ DEFAULT now(), updated_at TIMESTAMPTZ DEFAULT now()
+);
+"""
+
+
+def _percentile(sorted_vals: list[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def _parse_args(argv):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", type=int, default=500)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to each fake LinkedIn call")
+    ap.add_argument("--concurrency", type=int, default=4, help="keep below the DB pool size (5)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    fake = FakeLinkedIn(latency=args.latency)
+    base_url = fake.start()
+    os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA}"
+    os.environ["LINKEDIN_API_BASE"] = base_url
+    os.environ["LINKEDIN_OAUTH_BASE"] = base_url
+    os.environ.setdefault("LINKEDIN_CLIENT_ID", "bench-client")
+    os.environ.setdefault("LINKEDIN_CLIENT_SECRET", "bench-secret")
+
+    from app.auth_utils import create_oauth_state
+    from app.db import get_conn, put_conn
+    from app.jobs import token_sweeper
+    from app.routes import oauth_linkedin
+    from app.services import linkedin_profile
+
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+    finally:
+        put_conn(conn)
+    token_sweeper.ensure_schema()
+    linkedin_profile.ensure_schema()
+
+    def sign_in(code: str) -> float:
+        t0 = time.perf_counter()
+        r = oauth_linkedin.linkedin_callback(code=code, state=create_oauth_state(0))
+        took = time.perf_counter() - t0
+        assert r.status_code == 307, r.status_code
+        return took
+
+    codes = [f"bench{i}" for i in range(args.users)]
+    results = {}
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        for phase in ("first sign-in", "repeat sign-in"):
+            t0 = time.perf_counter()
+            lat = sorted(pool.map(sign_in, codes))
+            results[phase] = (lat, time.perf_counter() - t0)
+    fake.stop()
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*), count(*) FILTER (WHERE password_hash LIKE '!%%') FROM users")
+            n_users, n_unusable = cur.fetchone()
+            cur.execute("SELECT count(*) FROM tokens_linkedin")
+            n_tokens = cur.fetchone()[0]
+    finally:
+        put_conn(conn)
+
+    print(f"fake LinkedIn latency {args.latency * 1000:.0f} ms/call, concurrency {args.concurrency}")
+    for phase, (lat, wall) in results.items():
+        print(f"{phase:15s} p50/p95/p99 {_percentile(lat, 50) * 1000:7.1f} / {_percentile(lat, 95) * 1000:.1f} / "
+              f"{_percentile(lat, 99) * 1000:.1f} ms   {len(lat) / wall:8.1f} callbacks/s")
+    print(f"users {n_users} (unusable password {n_unusable}), tokens {n_tokens}")
+    return 0 if n_users == n_tokens == args.users else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
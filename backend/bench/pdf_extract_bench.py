@@ -0,0 +1,189 @@
+# bench/pdf_extract_bench.py
+"""
+Résumé PDF extraction throughput: fast vs layout mode, with and without page fan-out.
+
+Runs every PDF in `--corpus` (or `--generate` synthetic résumés of `--pages` pages each)
+through app.services.pdf_extract once per configuration. Each configuration runs in its own
+subprocess with a fresh pool, so peak RSS (caller and largest worker, from getrusage) isn't
+inherited from the previous one. Reports pages/sec, peak RSS and how close each mode's
+words are to the layout-mode text (Jaccard over the word sets, averaged over files).
+Exits non-zero if a configuration falls below `--min-similarity`.
+
+    cd backend
+    python -m bench.pdf_extract_bench --generate 40 --pages 1,2,3,24
+    python -m bench.pdf_extract_bench --corpus ~/resumes --workers 4
+
+No database or network needed.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIGS = [  # (mode, page fan-out)
+    ("layout", False),
+    ("layout", True),
+    ("fast", False),
+    ("fast", True),
+]
+
+_WORDS = ("python postgres fastapi kubernetes leadership analytics roadmap stakeholder "
+          "mentoring latency throughput migration observability revenue hiring design "
+          "architecture reliability product strategy customer platform growth").split()
+
+
+def _make_pdf(pages: int, rng: random.Random) -> bytes:
+    """A minimal text-only PDF: `pages` pages of Helvetica lines, some set with TJ kerning."""
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [b"BT /F1 10 Tf 12 TL 56 780 Td"]
+        for _ in range(55):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 12))]
+            if rng.random() < 0.3:
+                tj = b" ".join(b"(%s) -250" % w.encode() for w in words)
+                lines.append(b"[%s] TJ T*" % tj)
+            else:
+                lines.append(b"(%s) Tj T*" % " ".join(words).encode())
+        lines.append(b"ET")
+        stream = b"\n".join(lines)
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objs)
+        objs.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        kids.append(b"%d 0 R" % len(objs))
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _child(mode: str, files: list[str], out_path: str) -> int:
+    """One configuration, in a fresh process (pool size and fan-out come from the env the parent set)."""
+    from app.services import pdf_extract
+
+    blobs = []
+    for path in files:
+        with open(path, "rb") as f:
+            blobs.append(f.read())
+    pdf_extract.extract_text(max(blobs, key=len), max_pages=pdf_extract.MAX_PAGES, mode=mode)  # start workers
+
+    texts = []
+    t0 = time.perf_counter()
+    for data in blobs:
+        texts.append(pdf_extract.extract_text(data, max_pages=pdf_extract.MAX_PAGES, mode=mode))
+    took = time.perf_counter() - t0
+    pdf_extract.shutdown_pool(wait=True)  # reap workers so RUSAGE_CHILDREN sees them
+
+    with open(out_path, "w") as f:
+        json.dump({
+            "seconds": took,
+            "caller_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "worker_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            "texts": texts,
+        }, f)
+    return 0
+
+
+def _page_count(data: bytes) -> int:
+    # good enough for reporting: count page objects, not the /Pages nodes
+    return len(re.findall(rb"/Type\s*/Page(?![s\w])", data))
+
+
+def _parse_args(argv):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", help="directory of sample PDFs (default: generate synthetic ones)")
+    ap.add_argument("--generate", type=int, default=40, help="synthetic PDFs to generate without --corpus")
+    ap.add_argument("--pages", default="1,2,3,24", help="page counts cycled through by --generate")
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument("--parallel-min-pages", type=int, default=8)
+    ap.add_argument("--min-similarity", type=float, default=0.9)
+    ap.add_argument("--child", nargs=3, metavar=("MODE", "PARALLEL", "OUT"), help=argparse.SUPPRESS)
+    ap.add_argument("files", nargs="*", help=argparse.SUPPRESS)
+    return ap.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.child:
+        mode, _parallel, out_path = args.child
+        return _child(mode, args.files, out_path)
+
+    with tempfile.TemporaryDirectory(prefix="pdf_bench_") as tmp:
+        if args.corpus:
+            files = sorted(os.path.join(args.corpus, n) for n in os.listdir(args.corpus)
+                           if n.lower().endswith(".pdf"))
+        else:
+            rng = random.Random(42)
+            counts = [int(n) for n in args.pages.split(",")]
+            files = []
+            for i in range(args.generate):
+                path = os.path.join(tmp, f"resume{i:03d}.pdf")
+                with open(path, "wb") as f:
+                    f.write(_make_pdf(counts[i % len(counts)], rng))
+                files.append(path)
+        if not files:
+            print("no PDFs found")
+            return 1
+        total_pages = 0
+        for path in files:
+            with open(path, "rb") as f:
+                total_pages += _page_count(f.read())
+
+        results = {}
+        for mode, parallel in CONFIGS:
+            out_path = os.path.join(tmp, f"{mode}-{int(parallel)}.json")
+            env = dict(os.environ,
+                       PDF_WORKERS=str(args.workers),
+                       PDF_PARALLEL_MIN_PAGES=str(args.parallel_min_pages if parallel else 0),
+                       RESUME_MAX_PAGES="10000",
+                       RESUME_MAX_UPLOAD_BYTES=str(1 << 30),
+                       RESUME_EXTRACT_CPU_SECONDS="600",
+                       RESUME_EXTRACT_WALL_SECONDS="600")
+            subprocess.run([sys.executable, "-m", "bench.pdf_extract_bench",
+                            "--child", mode, str(int(parallel)), out_path, *files], env=env, check=True)
+            with open(out_path) as f:
+                results[(mode, parallel)] = json.load(f)
+
+    baseline = [_words(t) for t in results[("layout", False)]["texts"]]
+    print(f"{len(files)} PDFs, {total_pages} pages, {args.workers} workers, "
+          f"fan-out from {args.parallel_min_pages} pages")
+    print(f"{'mode':8s} {'fan-out':8s} {'seconds':>8s} {'pages/s':>9s} {'caller RSS':>11s} "
+          f"{'worker RSS':>11s} {'vs layout':>10s}")
+    failed = False
+    for (mode, parallel), r in results.items():
+        sims = []
+        for base, text in zip(baseline, r["texts"]):
+            words = _words(text)
+            sims.append(len(base & words) / len(base | words) if base | words else 1.0)
+        sim = sum(sims) / len(sims)
+        failed |= sim < args.min_similarity
+        print(f"{mode:8s} {'on' if parallel else 'off':8s} {r['seconds']:8.2f} "
+              f"{total_pages / r['seconds']:9.1f} {r['caller_rss_kb'] / 1024:8.1f} MB "
+              f"{r['worker_rss_kb'] / 1024:8.1f} MB {sim:10.3f}")
+    if failed:
+        print(f"FAIL: a configuration's text is below {args.min_similarity} similarity to layout mode")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# bench/scheduler_bench.py
+"""
+Scheduler capacity benchmark against a local Postgres and a fake LinkedIn.
+
+Seeds an isolated `sched_bench` schema (DB_* env from .env, like the app) with N
+scheduled_posts spread over a window, then drives app.jobs.scheduler.tick() on a
+simulated clock running `--speed` times faster than real time. Reports throughput,
+publish-lag percentiles (in simulated seconds) and duplicate publishes. Rate-limit
+deferrals (not_before) and Retry-After waits run on real time, so at high --speed
+they show up as simulated lag magnified by the speed factor.
+
+    cd backend
+    python -m bench.scheduler_bench --posts 100000 --window-minutes 60 --speed 60
+
+Never point this at a database you care about: it drops and recreates `sched_bench`.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from bench.fake_linkedin import FakeLinkedIn
+
+BENCH_SCHEMA = "sched_bench"
+
+SCHEMA_SQL = f"""
+DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;
+CREATE SCHEMA {BENCH_SCHEMA};
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY, name TEXT, email TEXT UNIQUE, country_code TEXT, mobile TEXT,
+    linkedin_id TEXT, password_hash TEXT, is_active BOOLEAN DEFAULT TRUE, onboarded BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT now(), updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE tokens_linkedin (
+    user_id INT PRIMARY KEY REFERENCES users(id), access_token TEXT, expires_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE linkedin_profile (
+    user_id INT PRIMARY KEY REFERENCES users(id), li_id TEXT, first_name TEXT, last_name TEXT,
+    picture_url TEXT, email TEXT, raw_json JSONB, fetched_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE posts (
+    id BIGSERIAL PRIMARY KEY, user_id INT REFERENCES users(id), idea_id INT, format TEXT,
+    draft_text TEXT, hashtags TEXT[], created_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE scheduled_posts (
+    id BIGSERIAL PRIMARY KEY, user_id INT REFERENCES users(id), text TEXT,
+    scheduled_at TIMESTAMPTZ, status VARCHAR(20), provider VARCHAR(20),
+    created_at TIMESTAMPTZ DEFAULT now(), updated_at TIMESTAMPTZ DEFAULT now()
+);
+"""
+
+
+def _percentile(sorted_vals: list[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def _parse_args(argv):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--posts", type=int, default=100_000)
+    ap.add_argument("--users", type=int, default=2_000)
+    ap.add_argument("--window-minutes", type=float, default=60)
+    ap.add_argument("--burst-fraction", type=float, default=0.0,
+                    help="fraction of posts scheduled exactly on a round minute")
+    ap.add_argument("--speed", type=float, default=60, help="simulated seconds per real second")
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--ambiguous-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rps", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--app-rps", type=float, default=100, help="app-wide publish token bucket rate")
+    ap.add_argument("--member-per-min", type=float, default=3, help="per-member publish token bucket rate")
+    ap.add_argument("--batch", type=int, default=50)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--timeout", type=float, default=1800, help="real seconds before giving up")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap.parse_args(argv)
+
+
+async def _drive(scheduler, deadline: float, count_open) -> None:
+    heartbeat = asyncio.create_task(scheduler._heartbeat(scheduler._in_flight))
+    last_check = 0.0
+    try:
+        while time.monotonic() < deadline:
+            if not await scheduler.tick():
+                if time.monotonic() - last_check > 1:
+                    last_check = time.monotonic()
+                    if not await asyncio.to_thread(count_open):
+                        return
+                await asyncio.sleep(0.02)
+    finally:
+        heartbeat.cancel()
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    fake = FakeLinkedIn(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        ambiguous_rate=args.ambiguous_rate, throttle_rps=args.throttle_rps,
+                        retry_after=args.retry_after, seed=args.seed)
+    base_url = fake.start()
+
+    # Everything below must be configured before the app modules read their env.
+    os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA}"
+    os.environ["LINKEDIN_API_BASE"] = base_url
+    os.environ["SCHEDULER_BATCH_LIMIT"] = str(args.batch)
+    os.environ["SCHEDULER_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LINKEDIN_APP_PUBLISH_RPS"] = str(args.app_rps)
+    os.environ["LINKEDIN_APP_PUBLISH_BURST"] = str(max(1.0, args.app_rps * 2))
+    os.environ["LINKEDIN_MEMBER_PUBLISHES_PER_MINUTE"] = str(args.member_per_min)
+
+    from app.db import get_conn, put_conn
+    from app.jobs import scheduler
+    from app.services import linkedin_media, linkedin_publish
+
+    window_sec = args.window_minutes * 60
+    sim_start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+    print(f"[bench] seeding {args.posts} posts for {args.users} users over {args.window_minutes} min ...")
+    conn = get_conn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+            cur.execute("""
+                INSERT INTO users (name, email, linkedin_id)
+                SELECT 'bench ' || g, 'bench' || g || '@example.test', 'li' || g
+                FROM generate_series(1, %s) g
+            """, (args.users,))
+            cur.execute("""
+                INSERT INTO tokens_linkedin (user_id, access_token, expires_at)
+                SELECT id, 'tok-' || id, now() + interval '30 days' FROM users
+            """)
+            cur.execute("INSERT INTO linkedin_profile (user_id, li_id) SELECT id, 'li' || id FROM users")
+            cur.execute("SELECT setseed(%s)", (1 / (1 + args.seed),))
+            cur.execute("""
+                INSERT INTO scheduled_posts (user_id, text, scheduled_at, status, provider)
+                SELECT 1 + (g %% %(users)s),
+                       'bench post #' || g,
+                       CASE WHEN random() < %(burst)s
+                            THEN %(start)s + floor(random() * %(window)s / 60) * interval '1 minute'
+                            ELSE %(start)s + random() * %(window)s * interval '1 second' END,
+                       'queued', 'linkedin'
+                FROM generate_series(1, %(n)s) g
+            """, {"users": args.users, "burst": args.burst_fraction, "start": sim_start,
+                  "window": window_sec, "n": args.posts})
+    finally:
+        put_conn(conn)
+    scheduler.ensure_schema()
+    linkedin_publish.ensure_schema()
+    linkedin_media.ensure_schema()
+
+    def count_open() -> int:
+        c = get_conn()
+        try:
+            with c.cursor() as cur:
+                cur.execute("SELECT count(*) FROM scheduled_posts WHERE status IN ('queued','posting')")
+                return cur.fetchone()[0]
+        finally:
+            put_conn(c)
+
+    t0 = time.monotonic()
+    scheduler.set_clock(lambda: sim_start + timedelta(seconds=(time.monotonic() - t0) * args.speed))
+    print(f"[bench] driving scheduler (speed={args.speed}x, batch={args.batch}, concurrency={args.concurrency}) ...")
+    asyncio.run(_drive(scheduler, t0 + args.timeout, count_open))
+    elapsed = time.monotonic() - t0
+    scheduler.set_clock(None)
+    fake.stop()
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, count(*) FROM scheduled_posts GROUP BY status ORDER BY status")
+            by_status = cur.fetchall()
+            cur.execute("SELECT id, scheduled_at FROM scheduled_posts")
+            due_at = {f"bench post #{i}": at for i, at in cur.fetchall()}
+    finally:
+        put_conn(conn)
+
+    lags = sorted(
+        max(0.0, (sim_start + timedelta(seconds=(ts - t0) * args.speed) - due_at[text]).total_seconds())
+        for ts, _a, text, _u in fake.posts if text in due_at
+    )
+    created = len(fake.posts)
+    print()
+    print(f"real elapsed        {elapsed:10.1f} s   (simulated window {window_sec:.0f} s)")
+    print(f"created on LinkedIn {created:10d}")
+    print(f"throughput          {created / elapsed if elapsed else 0:10.1f} posts/s")
+    print(f"lag p50/p90/p99/max {_percentile(lags, 50):8.1f} / {_percentile(lags, 90):.1f} / "
+          f"{_percentile(lags, 99):.1f} / {(lags[-1] if lags else 0):.1f} simulated s")
+    print(f"duplicate publishes {fake.duplicates():10d}")
+    print(f"fake HTTP statuses  {dict(fake.status_counts)}")
+    print(f"final row statuses  {dict(by_status)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -57,6 +57,9 @@ export class AuthService {
     fd.append('file', file);
     return this.http.post<any>(`${this.base}/profile/upload-resume`, fd);
   }
+  resumeStatus(resumeId: number, wait = 20) {
+    return this.http.get<any>(`${this.base}/profile/resume-status/${resumeId}`, { params: { wait } });
+  }
 
   getProfile() {
     return this.http.get<{
@@ -90,7 +93,9 @@ export class AuthService {
     publish_now?: boolean;
     visibility?: 'PUBLIC' | 'CONNECTIONS';
   }) {
-    return this.http.post<{ post_id: number; text: string; format: string }>(
+    // with publish_now: publish_status 'posted', or 'queued' (HTTP 202) -> poll publishStatus
+    return this.http.post<{ post_id: number; text: string; format: string;
+                            publish_status?: string | null; linkedin_urn?: string | null; status_url?: string | null }>(
       `/api/content/generate`, payload
     );
   }
@@ -101,12 +106,20 @@ export class AuthService {
     );
   }
 
+  // 200 {message, linkedin_urn} when published inline; 202 {message, post_id, status_url}
+  // when queued -- then poll publishStatus(post_id) until it is posted/failed/needs_reauth
   publishNow(body: { post_id: number; visibility?: 'PUBLIC'|'CONNECTIONS' }) {
-    return this.http.post<{ message: string; linkedin_urn?: string }>(
+    return this.http.post<{ message: string; linkedin_urn?: string; post_id?: number; status_url?: string }>(
       `/api/content/publish-now`, body
     );
   }
 
+  publishStatus(postId: number) {
+    return this.http.get<{ post_id: number; status: string; linkedin_urn: string | null; error: string | null }>(
+      `/api/content/publish-status/${postId}`
+    );
+  }
+
 
 
 
@@ -10,8 +10,21 @@ type GenOut = {
   post_id: number;
   text: string;
   format: 'short_post' | 'article' | 'carousel';
+  publish_status?: 'posted' | 'queued' | null;   // when publish_now
+  linkedin_urn?: string | null;
+  status_url?: string | null;
 };
 
+type PublishStatus = {
+  post_id: number;
+  status: string;   // draft | queued | posting | posted | failed | needs_reauth
+  linkedin_urn: string | null;
+  error: string | null;
+};
+
+const PUBLISH_POLL_MS = 2000;
+const PUBLISH_POLL_TRIES = 30;
+
 @Component({
   selector: 'app-compose',
   standalone: true,
@@ -90,7 +103,24 @@ export class ComposeComponent {
       this.draft = res;
       this.lastDraft = { when: new Date().toLocaleString(), text: res.text };
 
-      this.success = publishNow ? 'Posted to LinkedIn ✅' : 'Draft generated ✅';
+      if (!publishNow) {
+        this.success = 'Draft generated ✅';
+      } else if (res.publish_status === 'queued') {
+        this.success = 'Queued for LinkedIn…';
+        const s = await this.waitForPublish(res.post_id);
+        if (!s) {
+          this.success = 'Queued for LinkedIn — it will be posted shortly ⏳';
+        } else if (s.status === 'posted') {
+          this.success = 'Posted to LinkedIn ✅';
+        } else {
+          this.success = '';
+          this.error = s.status === 'needs_reauth'
+            ? 'LinkedIn needs reconnecting before this post can be published'
+            : s.error || 'Publishing to LinkedIn failed';
+        }
+      } else {
+        this.success = 'Posted to LinkedIn ✅';
+      }
     } catch (e: any) {
       this.error = e?.error?.detail || e?.message || 'Failed to generate';
     } finally {
@@ -98,6 +128,18 @@ export class ComposeComponent {
     }
   }
 
+  /** 202 from publish_now: the publish queue posts it; poll until it settles (or we give up waiting) */
+  private async waitForPublish(postId: number): Promise<PublishStatus | null> {
+    for (let i = 0; i < PUBLISH_POLL_TRIES; i++) {
+      await new Promise(resolve => setTimeout(resolve, PUBLISH_POLL_MS));
+      const s = await firstValueFrom(
+        this.http.get<PublishStatus>(`/api/content/publish-status/${postId}`)
+      );
+      if (s.status !== 'queued' && s.status !== 'posting') return s;
+    }
+    return null;
+  }
+
   private combineDateTimeToISO(dateStr: string, timeStr: string): string {
     // interpret input as local time, then convert to UTC ISO
     const [h, m] = timeStr.split(':').map(Number);
@@ -95,12 +95,26 @@ export class HomeComponent implements OnInit {
 
     try {
       this.uploading = true;
-      await this.auth.uploadResume(file)
+      let res: any = await this.auth.uploadResume(file)
         .pipe(catchError((e: any) => {
           this.uploadError = e?.error?.detail || 'Upload failed';
           return of(null);
         }))
         .toPromise();
+      // 202: analysis runs in the background; long-poll until it settles
+      while (res?.resume_id && (res.status === 'queued' || res.status === 'analyzing')) {
+        this.uploadOk = 'Résumé uploaded, analyzing…';
+        res = await this.auth.resumeStatus(res.resume_id)
+          .pipe(catchError((e: any) => {
+            this.uploadError = e?.error?.detail || 'Could not check analysis status';
+            return of(null);
+          }))
+          .toPromise();
+      }
+      if (res?.status === 'failed') {
+        this.uploadOk = '';
+        this.uploadError = 'Résumé uploaded, but the analysis failed. Please try again.';
+      }
       if (!this.uploadError) {
         this.uploadOk = 'Résumé uploaded and analyzed!';
         this.loadSummary(); // refresh chips + seed